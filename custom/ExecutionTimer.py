@@ -1,7 +1,10 @@
 """ExecutionTimer.py - A reusable class to measure execution time."""
 
+from dataclasses import dataclass
 from enum import Enum
-from time import time
+from time import perf_counter_ns, process_time_ns
+
+from instrumentation import metrics
 
 
 class TimeUnits(Enum):
@@ -12,12 +15,71 @@ class TimeUnits(Enum):
     days = 24 * 60**2
 
 
+# (upper bound in seconds, divisor, unit, format spec), checked in order
+_FORMATS = (
+    (1e-6, 1e-9, "ns", ".0f"),
+    (1e-3, 1e-6, "µs", ".0f"),
+    (TimeUnits.seconds.value, TimeUnits.ms.value, TimeUnits.ms.name, ".0f"),
+    (TimeUnits.minutes.value, TimeUnits.seconds.value, TimeUnits.seconds.name, ".2f"),
+    (TimeUnits.hours.value, TimeUnits.minutes.value, TimeUnits.minutes.name, ".2f"),
+    (TimeUnits.days.value, TimeUnits.hours.value, TimeUnits.hours.name, ".2f"),
+)
+
+
+def format_duration(seconds: float) -> str:
+    """Format a duration using the largest unit which keeps the value readable.
+
+    Examples
+    --------
+        >>> format_duration(0.25) -> '250 ms'
+        >>> format_duration(90) -> '1.50 minutes'
+    """
+    for bound, divisor, unit, spec in _FORMATS:
+        if seconds < bound:
+            return f"{seconds / divisor:{spec}} {unit}"
+    return f"{seconds / TimeUnits.days.value:.2f} {TimeUnits.days.name}"
+
+
+@dataclass(frozen=True, slots=True)
+class Lap:
+    """A named phase of an `ExecutionTimer`.
+
+    Attributes
+    ----------
+        name (str): Name passed to `ExecutionTimer.lap`.
+        wall_time (float): Wall clock seconds since the previous lap (or the start).
+        cpu_time (float): CPU seconds of this process since the previous lap.
+        split (float): Wall clock seconds since the start of the timer.
+    """
+
+    name: str
+    wall_time: float
+    cpu_time: float
+    split: float
+
+    def __str__(self) -> str:
+        wall, cpu = format_duration(self.wall_time), format_duration(self.cpu_time)
+        return f"{self.name}: {wall} (cpu {cpu})"
+
+
 class ExecutionTimer:
-    """Class for timing the execution of a block of code."""
+    """Class for timing the execution of a block of code.
+
+    Wall time is measured with `perf_counter_ns`, which is monotonic and unaffected by
+    clock adjustments, and CPU time with `process_time_ns`. A long block can be broken
+    into phases with `lap`:
+
+    >>> with ExecutionTimer("Remove duplicates") as timer:
+            groups = find_duplicates()
+            timer.lap("index")
+            remove(groups)
+            timer.lap("remove")
+    """
 
     start_time: float = 0.0
     end_time: float = 0.0
     execution_time: float = 0.0
+    cpu_time: float = 0.0
 
     def __init__(self, title: str | None = None, /, print_on_exit=True) -> None:
         """Initialize the instance."""
@@ -25,17 +87,63 @@ class ExecutionTimer:
         if title is not None:
             print(f"\n\033[94m{title}\033[0m")
         self.print_on_exit = print_on_exit
+        self.laps: list[Lap] = []
 
     def __enter__(self):
         """Context manager method to start the timer."""
-        self.start_time = time()
+        self.laps = []
+        self._start_ns = self._lap_ns = perf_counter_ns()
+        self._cpu_start_ns = self._lap_cpu_ns = process_time_ns()
+        self.start_time = self._start_ns / 1e9
         return self
 
     def __exit__(self, exc_type, exc_value, traceback) -> None:
-        self.end_time = time()
-        self.execution_time = self.end_time - self.start_time
+        end_ns = perf_counter_ns()
+        self.cpu_time = (process_time_ns() - self._cpu_start_ns) / 1e9
+        self.end_time = end_ns / 1e9
+        self.execution_time = (end_ns - self._start_ns) / 1e9
+        if metrics.enabled:
+            self._record()
         if self.print_on_exit:
-            print(f"\n\033[34mExecution time: {self!s}\033[0m")
+            for lap in self.laps:
+                wall, cpu = format_duration(lap.wall_time), format_duration(lap.cpu_time)
+                print(f"\033[34m  {lap.name:<24} {wall:>14} (cpu {cpu})\033[0m")
+            cpu = format_duration(self.cpu_time)
+            print(f"\n\033[34mExecution time: {self!s} (cpu {cpu})\033[0m")
+
+    def _record(self) -> None:
+        """Report the execution time and laps to `metrics`."""
+        title = self.title or ""
+        metrics.observe("execution_timer_seconds", self.execution_time, title=title)
+        metrics.observe("execution_timer_cpu_seconds", self.cpu_time, title=title)
+        for lap in self.laps:
+            metrics.observe("execution_timer_lap_seconds", lap.wall_time, title=title, lap=lap.name)
+
+    def lap(self, name: str | None = None) -> Lap:
+        """Record the time spent since the previous lap (or the start) as a named phase.
+
+        ### Parameters:
+        -----------------
+            - `name (str | None)`: Name of the phase. Defaults to `lap <n>`.
+
+        ### Returns:
+        ------------
+            - `Lap` with the wall and CPU time of the phase and the split since the start.
+        """
+        now_ns, cpu_ns = perf_counter_ns(), process_time_ns()
+        lap = Lap(
+            name=name or f"lap {len(self.laps) + 1}",
+            wall_time=(now_ns - self._lap_ns) / 1e9,
+            cpu_time=(cpu_ns - self._lap_cpu_ns) / 1e9,
+            split=(now_ns - self._start_ns) / 1e9,
+        )
+        self._lap_ns, self._lap_cpu_ns = now_ns, cpu_ns
+        self.laps.append(lap)
+        return lap
+
+    def split(self) -> float:
+        """Return the wall clock seconds elapsed since the start without recording a lap."""
+        return (perf_counter_ns() - self._start_ns) / 1e9
 
     def __str__(self) -> str:
         """Convert result from seconds to hours, minutes, seconds, and/or milliseconds.
@@ -45,37 +153,4 @@ class ExecutionTimer:
             str: A string representation of the execution time, formatted according
                 to the largest possible unit.
         """
-        template = "{minutes}{major_unit}{seconds} {minor_unit}"
-        time_seconds = self.execution_time
-
-        # Check if the time is less than a millisecond
-        for unit in TimeUnits:
-            if time_seconds < TimeUnits.seconds.value:
-                return template.format(
-                    minutes="",
-                    major_unit="",
-                    seconds=f"{time_seconds / TimeUnits.ms.value:.0f}",
-                    minor_unit=TimeUnits.ms.name,
-                )
-            if unit.name == "ms":
-                continue
-            time_seconds /= unit.value
-            if time_seconds < TimeUnits.minutes.value:
-                return template.format(
-                    minutes="",
-                    major_unit="",
-                    seconds=f"{time_seconds:.2f}",
-                    minor_unit=unit.name,
-                )
-            if time_seconds < TimeUnits.hours.value:
-                return template.format(
-                    minutes="",
-                    major_unit="",
-                    seconds=f"{time_seconds:.0f}",
-                    minor_unit=unit.name,
-                )
-
-            time_seconds /= TimeUnits.minutes.value
-
-        # If no units are left, return the time in days
-        return f"{time_seconds / 60 / 24:.2f} {TimeUnits.days.name.lower()}"
+        return format_duration(self.execution_time)
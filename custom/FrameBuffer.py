@@ -1,21 +1,131 @@
+import tempfile
+import zlib
+from bisect import bisect_left
 from collections import deque
+from collections.abc import Iterable, Iterator
+from typing import Any
 
+import numpy as np
 from numpy import ndarray
 
 
+class FrameCodec:
+    """Stores frames as they are. Base class of the codecs `FrameBuffer` can compress with.
+
+    Subclasses turn a frame into a compact blob in `encode` and back in `decode`. Lossy
+    codecs trade image quality, and all of them CPU time, for more buffered frames.
+    """
+
+    def encode(self, frame: ndarray) -> Any:
+        return frame
+
+    def decode(self, data: Any) -> ndarray:
+        return data
+
+    @staticmethod
+    def size_of(data: Any) -> int:
+        """Number of bytes used by an encoded frame."""
+        return data.nbytes if isinstance(data, ndarray) else len(data[0])
+
+
+class JpegCodec(FrameCodec):
+    """Lossy JPEG compression with OpenCV. Fast, and usually 10-20x smaller than raw frames."""
+
+    def __init__(self, quality: int = 90) -> None:
+        import cv2
+
+        self._cv2 = cv2
+        self.params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+
+    def encode(self, frame: ndarray) -> ndarray:
+        ok, data = self._cv2.imencode(".jpg", frame, self.params)
+        if not ok:
+            raise ValueError("Failed to encode frame as JPEG")
+        return data
+
+    def decode(self, data: ndarray) -> ndarray:
+        return self._cv2.imdecode(data, self._cv2.IMREAD_UNCHANGED)
+
+
+class PngCodec(JpegCodec):
+    """Lossless PNG compression with OpenCV. A low `level` favours speed over size."""
+
+    def __init__(self, level: int = 1) -> None:
+        import cv2
+
+        self._cv2 = cv2
+        self.params = [cv2.IMWRITE_PNG_COMPRESSION, level]
+
+    def encode(self, frame: ndarray) -> ndarray:
+        ok, data = self._cv2.imencode(".png", frame, self.params)
+        if not ok:
+            raise ValueError("Failed to encode frame as PNG")
+        return data
+
+
+class ZlibCodec(FrameCodec):
+    """Lossless compression of the raw pixels with zlib, without depending on OpenCV."""
+
+    def __init__(self, level: int = 1) -> None:
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        return zlib.compress(data, self.level)
+
+    def decompress(self, data: bytes) -> bytes:
+        return zlib.decompress(data)
+
+    def encode(self, frame: ndarray) -> tuple[bytes, tuple[int, ...], np.dtype]:
+        return self.compress(frame.tobytes()), frame.shape, frame.dtype
+
+    def decode(self, data: tuple[bytes, tuple[int, ...], np.dtype]) -> ndarray:
+        blob, shape, dtype = data
+        # bytearray keeps the decoded frame writable
+        return np.frombuffer(bytearray(self.decompress(blob)), dtype).reshape(shape)
+
+
+class Lz4Codec(ZlibCodec):
+    """Lossless LZ4 compression of the raw pixels. Faster than zlib, requires `lz4`."""
+
+    def __init__(self, level: int = 0) -> None:
+        import lz4.frame
+
+        self._lz4 = lz4.frame
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        return self._lz4.compress(data, compression_level=self.level)
+
+    def decompress(self, data: bytes) -> bytes:
+        return self._lz4.decompress(data)
+
+
 class FrameBuffer:
-    buffer: deque[tuple[ndarray, int]]
+    """Keep the most recent `max_size` frames.
 
-    def __init__(self, max_size: int) -> None:
+    With a `codec`, frames are compressed as they are added and only decoded when they
+    are read back, which holds 5-20x more frames in the same memory:
+
+    >>> buffer = FrameBuffer(BUFFER * 10, codec=JpegCodec(quality=85))
+    """
+
+    buffer: deque[tuple[Any, int]]
+
+    def __init__(self, max_size: int, codec: FrameCodec | None = None) -> None:
         """Initialize the frame buffer.
 
         ### Paramters:
         -----------------
             - `max_size (int)`: Maximum number of frames to store.
+            - `codec (FrameCodec | None)`: Compress the stored frames, e.g. `JpegCodec`,
+                `PngCodec`, `ZlibCodec` or `Lz4Codec`. Frames are stored as given if None.
         """
         self.max_size = max_size
+        self.codec = codec
         self.buffer = deque(maxlen=max_size)
         self.index = deque(maxlen=max_size)
+        # High-water mark: the newest frame number returned by `drain_unexported`
+        self.exported_until = -1
 
     def add_frame(self, frame: tuple[ndarray, int]) -> None:
         """Add a new frame to the buffer.
@@ -24,6 +134,8 @@ class FrameBuffer:
         ---------------
             - `frame (ndarray)`: The frame to add.
         """
+        if self.codec is not None:
+            frame = (self.codec.encode(frame[0]), frame[1])
         if len(self.buffer) < self.max_size:
             self.buffer.append(frame)
         else:
@@ -38,17 +150,26 @@ class FrameBuffer:
         ------------
         - `list[ndarray]`: The current frames in the buffer as a list.
         """
-        return list(self.buffer)
+        return self._decode(self.buffer)
+
+    def iter_frames(self) -> Iterator[tuple[ndarray, int]]:
+        """Yield the frames in the buffer one at a time.
+
+        With a codec, only the frame being written out is decoded at any time.
+        """
+        for data, index in list(self.buffer):
+            yield (data if self.codec is None else self.codec.decode(data)), index
 
     def get_recent_frames(self, num_frames: int) -> list[tuple[ndarray, int]]:
         """Get a specified number of recent frames from the buffer.
 
         ### Parameters:
         -----------------
-            - `num_frames (int)`: The number of recent frames to return.
+            - `num_frames (int)`: The number of recent frames to return, oldest first.
         """
-        num_frames = min(num_frames, len(self.buffer))
-        return list(self.buffer)[num_frames:]
+        if num_frames <= 0:
+            return []
+        return self._decode(list(self.buffer)[-num_frames:])
 
     def get_future_frames(self, num_frames: int) -> list[tuple[ndarray, int]]:
         """Get a specified number of older frames from the buffer.
@@ -58,7 +179,52 @@ class FrameBuffer:
             - `num_frames (int)`: The number of older frames to return.
         """
         num_frames = min(num_frames, len(self.buffer))
-        return list(self.buffer)[:num_frames]
+        return self._decode(list(self.buffer)[:num_frames])
+
+    def get_frame_range(self, start: int, stop: int | None = None) -> list[tuple[ndarray, int]]:
+        """Get the buffered frames whose frame number is in `[start, stop)`.
+
+        ### Parameters:
+        -----------------
+            - `start (int)`: First frame number.
+            - `stop (int | None)`: Frame number to stop before. Unbounded if None.
+        """
+        return self._decode(
+            (data, index)
+            for data, index in self.buffer
+            if start <= index and (stop is None or index < stop)
+        )
+
+    def drain_unexported(self) -> list[tuple[ndarray, int]]:
+        """Get the frames added since the previous call and mark them as exported.
+
+        Overlapping windows (e.g. two kills within `max_size` frames) are merged without
+        returning a frame twice. Only the new frames are visited.
+        """
+        new = []
+        for entry in reversed(self.buffer):
+            if entry[1] <= self.exported_until:
+                break
+            new.append(entry)
+        if new:
+            self.exported_until = new[0][1]
+        return self._decode(reversed(new))
+
+    def _decode(self, frames: Iterable[tuple[Any, int]]) -> list[tuple[ndarray, int]]:
+        if self.codec is None:
+            return list(frames)
+        return [(self.codec.decode(data), index) for data, index in frames]
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the stored (encoded) frames."""
+        return sum(FrameCodec.size_of(data) for data, _ in self.buffer)
+
+    def next_slot(self) -> None:
+        """Frames are stored as given, so there is no slot to decode into.
+
+        See `RingFrameBuffer` for a buffer frames can be decoded into.
+        """
 
     def release(self) -> None:
         """Release the buffer by emptying it."""
@@ -67,3 +233,293 @@ class FrameBuffer:
 
     def __repr__(self) -> str:
         return f"FrameBuffer({list(self.buffer)})"
+
+
+class RingFrameBuffer:
+    """A `FrameBuffer` backed by a single preallocated `(max_size, H, W, C)` array.
+
+    Frames can be decoded straight into the next free slot, so the decode loop never
+    allocates, and frames come back as views into the buffer instead of copies:
+
+    >>> buffer = RingFrameBuffer(BUFFER, shape=(1080, 1920, 3))
+        while True:
+            ret, frame = cap.read(buffer.next_slot())
+            if not ret:
+                break
+            buffer.add_frame((frame, count))  # No copy, the frame is already in its slot
+
+    Views stay valid until their slot is reused `max_size` frames later; copy frames
+    which must outlive that.
+    """
+
+    frames: ndarray | None
+    indices: ndarray
+
+    def __init__(
+        self, max_size: int, shape: tuple[int, ...] | None = None, dtype=np.uint8
+    ) -> None:
+        """Initialize the frame buffer.
+
+        ### Parameters:
+        -----------------
+            - `max_size (int)`: Maximum number of frames to store.
+            - `shape (tuple[int, ...] | None)`: Shape of a frame, e.g. `(1080, 1920, 3)`.
+                If None, the buffer is allocated when the first frame is added.
+            - `dtype`: Data type of the frames.
+        """
+        self.max_size = max_size
+        self.dtype = dtype
+        self.frames = None
+        self.indices = np.full(max_size, -1, dtype=np.int64)
+        self._head = 0  # Slot the next frame is written to
+        self._size = 0
+        # High-water mark: the newest frame number returned by `drain_unexported`
+        self.exported_until = -1
+        if shape is not None:
+            self._allocate(shape)
+
+    def _allocate(self, shape: tuple[int, ...]) -> None:
+        self.frames = np.empty((self.max_size, *shape), dtype=self.dtype)
+
+    def next_slot(self) -> ndarray | None:
+        """Return the slot the next frame will be stored in, e.g. for `cap.read(slot)`.
+
+        Returns None until the frame shape is known.
+        """
+        if self.frames is None:
+            return None
+        return self.frames[self._head]
+
+    def add_frame(self, frame: tuple[ndarray, int]) -> None:
+        """Add a new frame to the buffer, overwriting the oldest one when it is full.
+
+        ### Parameters:
+        ---------------
+            - `frame (tuple[ndarray, int])`: The frame and its index in the video. The
+                frame is only copied if it wasn't decoded into `next_slot()`.
+        """
+        image, index = frame
+        if self.frames is None:
+            self._allocate(image.shape)
+        slot = self.frames[self._head]
+        if not np.may_share_memory(image, slot):
+            np.copyto(slot, image)
+        self.indices[self._head] = index
+        self._head = (self._head + 1) % self.max_size
+        self._size = min(self._size + 1, self.max_size)
+
+    def _slots(self, start: int, stop: int) -> Iterable[int]:
+        """Slots of the frames `start:stop`, counted from the oldest frame."""
+        oldest = self._head - self._size
+        return ((oldest + i) % self.max_size for i in range(start, stop))
+
+    def _window(self, start: int, stop: int) -> list[tuple[ndarray, int]]:
+        if self.frames is None:
+            return []
+        frames, indices = self.frames, self.indices
+        return [(frames[slot], int(indices[slot])) for slot in self._slots(start, stop)]
+
+    def get_frames(self) -> list[tuple[ndarray, int]]:
+        """Get all frames currently in the buffer, oldest first, as views."""
+        return self._window(0, self._size)
+
+    def get_recent_frames(self, num_frames: int) -> list[tuple[ndarray, int]]:
+        """Get the `num_frames` most recent frames, oldest first, as views."""
+        return self._window(max(0, self._size - num_frames), self._size)
+
+    def get_future_frames(self, num_frames: int) -> list[tuple[ndarray, int]]:
+        """Get the `num_frames` oldest frames, oldest first, as views."""
+        return self._window(0, min(num_frames, self._size))
+
+    def get_frame_range(self, start: int, stop: int | None = None) -> list[tuple[ndarray, int]]:
+        """Get the frames whose frame number is in `[start, stop)`, as views.
+
+        Frame numbers increase from the oldest to the newest frame, so the bounds are
+        found with a binary search.
+        """
+        oldest = self._head - self._size
+
+        def number(i: int) -> int:
+            return self.indices[(oldest + i) % self.max_size]
+
+        first = bisect_left(range(self._size), start, key=number)
+        last = self._size if stop is None else bisect_left(range(self._size), stop, key=number)
+        return self._window(first, max(first, last))
+
+    def _count_newer(self, index: int) -> int:
+        """Number of frames, counted from the newest, with a frame number above `index`."""
+        count = 0
+        while (
+            count < self._size
+            and self.indices[(self._head - 1 - count) % self.max_size] > index
+        ):
+            count += 1
+        return count
+
+    def drain_unexported(self) -> list[tuple[ndarray, int]]:
+        """Get the frames added since the previous call and mark them as exported.
+
+        Overlapping windows (e.g. two kills within `max_size` frames) are merged without
+        returning a frame twice. Only the new frames are visited.
+        """
+        new = self._window(self._size - self._count_newer(self.exported_until), self._size)
+        if new:
+            self.exported_until = new[-1][1]
+        return new
+
+    def release(self) -> None:
+        """Release the buffer by dropping the preallocated array."""
+        self.frames = None
+        self._head = self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __repr__(self) -> str:
+        shape = None if self.frames is None else self.frames.shape[1:]
+        name = type(self).__name__
+        return f"{name}(max_size={self.max_size}, frames={self._size}, shape={shape})"
+
+
+class MemmapFrameBuffer(RingFrameBuffer):
+    """A `RingFrameBuffer` whose array is a memory-mapped file instead of RAM.
+
+    The kernel writes the frames out and drops them from memory as needed, so the
+    buffer can be far larger than the available RAM. Frames are paged back in only
+    when they are read.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        shape: tuple[int, ...] | None = None,
+        dtype=np.uint8,
+        path: str | None = None,
+    ) -> None:
+        """Initialize the frame buffer.
+
+        ### Parameters:
+        -----------------
+            - `max_size (int)`: Maximum number of frames to store.
+            - `shape (tuple[int, ...] | None)`: Shape of a frame, e.g. `(1080, 1920, 3)`.
+            - `dtype`: Data type of the frames.
+            - `path (str | None)`: File to map. Defaults to an anonymous temporary file
+                which is deleted on `release`.
+        """
+        self.path = path
+        self._file = None
+        super().__init__(max_size, shape, dtype)
+
+    def _allocate(self, shape: tuple[int, ...]) -> None:
+        self._file = open(self.path, "w+b") if self.path else tempfile.TemporaryFile()  # noqa: SIM115
+        self.frames = np.memmap(
+            self._file, dtype=self.dtype, mode="w+", shape=(self.max_size, *shape)
+        )
+
+    def release(self) -> None:
+        """Release the buffer by unmapping and closing the file."""
+        super().release()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class SpillingFrameBuffer:
+    """A `FrameBuffer` which keeps a small hot window in RAM and spills older frames to disk.
+
+    The newest `hot_size` frames live in a `RingFrameBuffer`. When a hot slot is about to
+    be reused, its frame is copied to a `MemmapFrameBuffer` holding the rest of the
+    window, so long pre-roll windows (minutes of 1080p) fit on machines with little RAM.
+    Same API as `RingFrameBuffer`, including decoding into `next_slot()`.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        hot_size: int = 16,
+        shape: tuple[int, ...] | None = None,
+        dtype=np.uint8,
+        path: str | None = None,
+    ) -> None:
+        """Initialize the frame buffer.
+
+        ### Parameters:
+        -----------------
+            - `max_size (int)`: Maximum number of frames to store, in RAM and on disk.
+            - `hot_size (int)`: Number of the most recent frames kept in RAM.
+            - `shape (tuple[int, ...] | None)`: Shape of a frame, e.g. `(1080, 1920, 3)`.
+            - `dtype`: Data type of the frames.
+            - `path (str | None)`: File for the spilled frames. Defaults to a temporary file.
+        """
+        self.max_size = max_size
+        self.hot = RingFrameBuffer(min(hot_size, max_size), shape, dtype)
+        cold_size = max_size - self.hot.max_size
+        self.cold = MemmapFrameBuffer(cold_size, shape, dtype, path) if cold_size else None
+        # True once the oldest hot frame was copied to `cold` but its slot not yet reused
+        self._spilled = False
+        # High-water mark: the newest frame number returned by `drain_unexported`
+        self.exported_until = -1
+
+    def _spill(self) -> None:
+        """Move the oldest hot frame to disk before its slot is overwritten."""
+        if len(self.hot) < self.hot.max_size or self._spilled:
+            return
+        if self.cold is not None:
+            self.cold.add_frame(self.hot.get_future_frames(1)[0])
+        self._spilled = True
+
+    def next_slot(self) -> ndarray | None:
+        """Return the RAM slot the next frame will be stored in, e.g. for `cap.read(slot)`."""
+        slot = self.hot.next_slot()
+        if slot is not None:
+            self._spill()
+        return slot
+
+    def add_frame(self, frame: tuple[ndarray, int]) -> None:
+        """Add a new frame to the buffer, spilling the oldest in-memory frame if needed."""
+        self._spill()
+        self.hot.add_frame(frame)
+        self._spilled = False
+
+    def get_frames(self) -> list[tuple[ndarray, int]]:
+        """Get all frames currently in the buffer, oldest first, as views."""
+        hot = self.hot.get_frames()
+        if self._spilled:
+            hot = hot[1:]
+        return (self.cold.get_frames() if self.cold is not None else []) + hot
+
+    def get_recent_frames(self, num_frames: int) -> list[tuple[ndarray, int]]:
+        """Get the `num_frames` most recent frames, oldest first, as views."""
+        return self.get_frames()[-num_frames:] if num_frames > 0 else []
+
+    def get_future_frames(self, num_frames: int) -> list[tuple[ndarray, int]]:
+        """Get the `num_frames` oldest frames, oldest first, as views."""
+        return self.get_frames()[:num_frames]
+
+    def get_frame_range(self, start: int, stop: int | None = None) -> list[tuple[ndarray, int]]:
+        """Get the frames whose frame number is in `[start, stop)`, as views."""
+        hot = self.hot.get_frame_range(start, stop)
+        if self._spilled and hot and hot[0][1] == self.hot.get_future_frames(1)[0][1]:
+            hot = hot[1:]  # Already moved to `cold`, its slot is about to be reused
+        cold = self.cold.get_frame_range(start, stop) if self.cold is not None else []
+        return cold + hot
+
+    def drain_unexported(self) -> list[tuple[ndarray, int]]:
+        """Get the frames added since the previous call and mark them as exported."""
+        new = self.get_frame_range(self.exported_until + 1)
+        if new:
+            self.exported_until = new[-1][1]
+        return new
+
+    def release(self) -> None:
+        """Release both the in-memory and the on-disk buffer."""
+        self.hot.release()
+        if self.cold is not None:
+            self.cold.release()
+        self._spilled = False
+
+    def __len__(self) -> int:
+        return len(self.hot) - self._spilled + (len(self.cold) if self.cold is not None else 0)
+
+    def __repr__(self) -> str:
+        return f"SpillingFrameBuffer(max_size={self.max_size}, hot={self.hot!r}, cold={self.cold!r})"
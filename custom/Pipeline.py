@@ -0,0 +1,299 @@
+"""Pipeline.py - Chain separately sized thread pool stages with bounded queues."""
+
+import threading
+from collections.abc import Callable, Generator, Iterable, Iterator, Sized
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from queue import Empty, Full, Queue
+from time import perf_counter
+from typing import Any, Self
+
+from instrumentation import metrics
+from ThreadPoolHelper import (
+    Failure,
+    PoolReport,
+    ProgressSink,
+    function_name,
+    progress_sink,
+    record_run,
+    report_failure,
+    run_chunk,
+)
+
+_END = object()
+_POLL_INTERVAL = 0.1
+
+
+@dataclass
+class Stage:
+    """A single step of a `Pipeline`.
+
+    Attributes:
+        function (Callable): Called with each item produced by the previous stage.
+        workers (int): Number of threads running `function`.
+        queue_size (int): Capacity of the queue feeding this stage.
+        args | kwargs: Additional arguments to pass to `function`.
+        report (PoolReport): Successes and failures of the stage's last run.
+    """
+
+    function: Callable[..., Any]
+    workers: int
+    queue_size: int
+    args: tuple = ()
+    kwargs: dict[str, Any] = field(default_factory=dict)
+    report: PoolReport = field(default_factory=PoolReport)
+
+
+class Pipeline:
+    """Run a chain of functions concurrently, each stage with its own worker count.
+
+    Stages are joined by bounded queues so a slow stage applies back-pressure to the
+    ones before it instead of letting results pile up in memory. Give slow stages
+    (e.g. EXIF parsing) more workers than fast ones. Idle workers of a stage pick up
+    the next queued item, so uneven items don't stall the stage.
+
+    A stage returning `None` drops the item, which makes it act as a filter. Failing
+    items are reported like `Pool` does and available in `stage.report`. Results are
+    forwarded as soon as they finish, even while the stage is waiting for input.
+
+    ### Example:
+    ------------
+    >>> pipeline = (
+            Pipeline()
+            .stage(File, workers=2)
+            .stage(read_capture_date, workers=16)
+            .stage(sha256, workers=4)
+            .stage(move, workers=2, dst=target)
+        )
+        for result in pipeline.run(os.scandir(path)):
+            print(result)
+    """
+
+    def __init__(self, *, queue_size: int = 64, suppress_exceptions: bool = False) -> None:
+        """Initialize an empty pipeline.
+
+        ### Parameters:
+        -----------------
+            - `queue_size (int)`: Default capacity of the queue in front of each stage.
+            - `suppress_exceptions (bool)`: If True, failing items are not printed.
+        """
+        self.queue_size = queue_size
+        self.suppress_exceptions = suppress_exceptions
+        self.stages: list[Stage] = []
+
+    def stage(
+        self,
+        function: Callable[..., Any],
+        /,
+        *args: Any,
+        workers: int = 4,
+        queue_size: int | None = None,
+        **kwargs: Any,
+    ) -> Self:
+        """Append a stage and return the pipeline so calls can be chained.
+
+        ### Parameters:
+        -----------------
+            - `function (Callable)`: Called with each item from the previous stage.
+            - `workers (int)`: Number of threads for this stage.
+            - `queue_size (int | None)`: Capacity of the queue feeding this stage.
+            - `*args` | `**kwargs`: Additional arguments to pass to `function`.
+        """
+        if workers < 1:
+            raise ValueError("workers must be a positive integer")
+        self.stages.append(
+            Stage(function, workers, queue_size or self.queue_size, args, kwargs)
+        )
+        return self
+
+    def run(
+        self,
+        data_source: Iterable[Any],
+        progress_bar: bool | ProgressSink = False,
+        *,
+        total: int | None = None,
+    ) -> Generator[Any]:
+        """Stream `data_source` through every stage and yield the results of the last one.
+
+        ### Parameters:
+        -----------------
+            - `data_source (Iterable)`: Items for the first stage. Consumed lazily.
+            - `progress_bar (bool | ProgressSink)`: Progress of the last stage.
+            - `total (int | None)`: Number of items used for the progress bar. Defaults to
+                `len(data_source)` when the data source is sized.
+
+        ### Returns:
+        ------------
+            - `Generator` of results in completion order. Closing it stops every stage.
+        """
+        if not self.stages:
+            yield from data_source
+            return
+        if total is None and isinstance(data_source, Sized):
+            total = len(data_source)
+
+        stop = threading.Event()
+        errors: list[BaseException] = []
+        queues = [Queue(maxsize=stage.queue_size) for stage in self.stages]
+        output: Queue = Queue(maxsize=self.queue_size)
+        threads = [
+            threading.Thread(
+                target=self._feed, args=(data_source, queues[0], stop, errors), daemon=True
+            )
+        ]
+        for i, stage in enumerate(self.stages):
+            last = i == len(self.stages) - 1
+            threads.append(
+                threading.Thread(
+                    target=self._work,
+                    args=(
+                        stage,
+                        queues[i],
+                        output if last else queues[i + 1],
+                        stop,
+                        errors,
+                        progress_bar if last else False,
+                        total,
+                    ),
+                    daemon=True,
+                )
+            )
+        for thread in threads:
+            thread.start()
+
+        try:
+            yield from _drain(output, stop)
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+        if errors:
+            raise errors[0]
+
+    @staticmethod
+    def _feed(
+        data_source: Iterable[Any], queue: Queue, stop: threading.Event, errors: list
+    ) -> None:
+        """Move items from the data source into the first stage's queue."""
+        try:
+            for item in data_source:
+                if not _put(queue, item, stop):
+                    return
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            _put(queue, _END, stop)
+
+    def _work(
+        self,
+        stage: Stage,
+        inbox: Queue,
+        outbox: Queue,
+        stop: threading.Event,
+        errors: list,
+        progress_bar: bool | ProgressSink,
+        total: int | None,
+    ) -> None:
+        """Run one stage: apply its function to everything in `inbox` and forward the results.
+
+        Items are submitted by a separate thread as they arrive, so finished results never
+        wait for the previous stage to produce more input.
+        """
+        report = stage.report = PoolReport()
+        progress = progress_sink(progress_bar)
+        progress.open(total)
+        executor = ThreadPoolExecutor(max_workers=stage.workers)
+        # Bounds the items submitted but not yet forwarded, like `Pool(max_pending=...)`
+        slots = threading.Semaphore(stage.workers * 2)
+        finished: Queue = Queue()
+        submitted = 0
+        exhausted = threading.Event()
+
+        def submit() -> None:
+            nonlocal submitted
+            try:
+                for item in _drain(inbox, stop):
+                    while not slots.acquire(timeout=_POLL_INTERVAL):
+                        if stop.is_set():
+                            return
+                    future = executor.submit(
+                        run_chunk, stage.function, [item], stage.args, stage.kwargs
+                    )
+                    submitted += 1
+                    future.add_done_callback(lambda f, item=item: finished.put((item, f)))
+            except BaseException as e:
+                errors.append(e)
+                stop.set()
+            finally:
+                exhausted.set()
+                finished.put(_END)
+
+        submitter = threading.Thread(target=submit, daemon=True)
+        submitter.start()
+        started = perf_counter()
+        completed = 0
+        try:
+            while not (exhausted.is_set() and completed == submitted):
+                try:
+                    entry = finished.get(timeout=_POLL_INTERVAL)
+                except Empty:
+                    if stop.is_set():
+                        break
+                    continue
+                if entry is _END:
+                    continue
+                item, future = entry
+                completed += 1
+                slots.release()
+                [(ok, value, latency)] = future.result()
+                progress.update(1, (latency,), submitted - completed)
+                if metrics.enabled:
+                    metrics.observe("pool_task_seconds", latency, function=function_name(stage.function))
+                if ok:
+                    report.succeeded += 1
+                    if value is not None and not _put(outbox, value, stop):
+                        break
+                else:
+                    report_failure(
+                        value,
+                        stage.function,
+                        item,
+                        stage.args,
+                        stage.kwargs,
+                        quiet=self.suppress_exceptions,
+                    )
+                    report.failures.append(Failure(item, value))
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            progress.close()
+            executor.shutdown(wait=not stop.is_set(), cancel_futures=True)
+            submitter.join()
+            if metrics.enabled:
+                record_run(stage.function, report, perf_counter() - started)
+            _put(outbox, _END, stop)
+
+
+def _put(queue: Queue, item: Any, stop: threading.Event) -> bool:
+    """Block until `item` is queued, returning False if the pipeline stopped first."""
+    while not stop.is_set():
+        try:
+            queue.put(item, timeout=_POLL_INTERVAL)
+        except Full:
+            continue
+        return True
+    return False
+
+
+def _drain(queue: Queue, stop: threading.Event) -> Iterator[Any]:
+    """Yield items from `queue` until the end marker arrives or the pipeline stops."""
+    while not stop.is_set():
+        try:
+            item = queue.get(timeout=_POLL_INTERVAL)
+        except Empty:
+            continue
+        if item is _END:
+            return
+        yield item
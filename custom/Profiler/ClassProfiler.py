@@ -1,25 +1,16 @@
-import cProfile
-import io
-import pstats
+from functools import wraps
 
+from .CumulativeProfiler import CumulativeProfiler
 
-class ClassProfiler:
-    """Class decorator for profiling code using cProfile."""
 
-    def __init__(self, output_file=None):
-        # Initialize the cProfile.Profile() object which will be used to profile our functions.
-        self.profiler = cProfile.Profile()
-        self.output_file = output_file
+class ClassProfiler(CumulativeProfiler):
+    """Class decorator for profiling code using cProfile.
 
-    def __call__(self, cls):
-        original_init = cls.__init__
-
-        def new_init(self, *args, **kwargs):
-            original_init(self, *args, **kwargs)
-            self.ttprofiler.enable()
-
-        cls.__init__ = new_init
+    Every method is profiled. Profile data is accumulated across calls and threads
+    and emitted once at exit (see `CumulativeProfiler` for `interval` and `signum`).
+    """
 
+    def __call__(self, cls):
         for attr_name, attr_value in vars(cls).items():
             if callable(attr_value) and not isinstance(attr_value, staticmethod):
                 setattr(cls, attr_name, self._profile_method(attr_value))
@@ -27,19 +18,9 @@ class ClassProfiler:
         return cls
 
     def _profile_method(self, func):
+        @wraps(func)
         def wrapper(*args, **kwargs):
-            result = self.profiler.runcall(func, *args, **kwargs)
-            sio = io.StringIO()
-            stats = pstats.Stats(self.profiler, stream=sio).sort_stats("cumulative")
-            stats.print_stats()
-            print(sio.getvalue())
-
-            if self.output_file:
-                with open(self.output_file, "w") as f:
-                    stats = pstats.Stats(self.profiler, stream=f).sort_stats("cumulative")
-                    stats.print_stats()
-
-            return result
+            return self.runcall(func, *args, **kwargs)
 
         return wrapper
 
@@ -47,7 +28,7 @@ class ClassProfiler:
 # TODO: Add this to docstring
 if __name__ == "__main__":
 
-    @ClassProfiler(output_file="profile_stats.txt")
+    @ClassProfiler(output_file="profile_stats.prof")
     class SomeClass:
         def method1(self) -> None:
             return
@@ -0,0 +1,116 @@
+import atexit
+import cProfile
+import pstats
+import signal
+import sys
+import threading
+
+from .Profiler import _SHARED_PROFILER, _active, _record_stats
+
+
+class _Snapshot:
+    """Stats of a profiler which may still be running in another thread.
+
+    `pstats.Stats(profiler)` disables the profiler it reads from. Taking a snapshot
+    instead leaves profiling in the other threads undisturbed.
+    """
+
+    def __init__(self, profiler):
+        profiler.snapshot_stats()
+        self.stats = profiler.stats
+
+    def create_stats(self):
+        pass
+
+
+class CumulativeProfiler:
+    """Base class accumulating cProfile data across calls and threads.
+
+    On Python 3.12+ a single `cProfile.Profile` is enabled while any profiled call is
+    running, in any thread. On older versions cProfile only sees the thread that
+    enabled it, so each thread gets its own profiler. Either way calls made from `Pool`
+    workers are captured too. The data of all threads is merged and emitted once at
+    exit, on `signum`, or every `interval` seconds instead of after every call. Calls
+    made while another profiler of this package is running, e.g. a profiled function
+    called by another, are recorded by that profiler.
+
+    Emitting writes a binary `.prof` file to `output_file`, which can be opened with
+    snakeviz or `pstats`, or prints the `top` entries sorted by cumulative time when
+    no output file is given.
+    """
+
+    def __init__(self, output_file=None, *, interval=None, signum=None, top=30):
+        """Initialize the profiler.
+
+        ### Parameters:
+        -----------------
+            - `output_file (str | None)`: Path of the `.prof` file to write.
+            - `interval (float | None)`: If set, also emit every `interval` seconds.
+            - `signum (int | None)`: If set, also emit when the signal is received,
+                e.g. `signal.SIGUSR1`. Must be created in the main thread.
+            - `top (int)`: Number of entries printed when there is no output file.
+        """
+        self.output_file = output_file
+        self.top = top
+        self._profilers: list[cProfile.Profile] = []
+        self._local = threading.local()
+        if _SHARED_PROFILER:
+            self._profilers.append(cProfile.Profile())
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+        atexit.register(self.emit)
+        if signum is not None:
+            signal.signal(signum, lambda *_: self.emit())
+        if interval is not None:
+            threading.Thread(
+                target=self._emit_every, args=(interval,), name="CumulativeProfiler", daemon=True
+            ).start()
+
+    def runcall(self, func, *args, **kwargs):
+        """Call `func` with this instance's profiler enabled (see `_ActiveProfiler`).
+
+        Nested calls, e.g. one profiled method calling another, reuse the running profiler.
+        """
+        _active.enter(self._profiler())
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _active.exit()
+
+    def _profiler(self) -> cProfile.Profile:
+        """Return the profiler to enable in the calling thread."""
+        if _SHARED_PROFILER:
+            return self._profilers[0]
+        profiler = getattr(self._local, "profiler", None)
+        if profiler is None:
+            profiler = self._local.profiler = cProfile.Profile()
+            with self._lock:
+                self._profilers.append(profiler)
+        return profiler
+
+    def stats(self) -> pstats.Stats | None:
+        """Merge the data of every thread, or return None if nothing was profiled yet."""
+        with self._lock:
+            profilers = list(self._profilers)
+        snapshots = [_Snapshot(profiler) for profiler in profilers]
+        snapshots = [snapshot for snapshot in snapshots if snapshot.stats]
+        if not snapshots:
+            return None
+        return pstats.Stats(*snapshots)
+
+    def emit(self) -> None:
+        """Write (or print) the accumulated profile."""
+        stats = self.stats()
+        if stats is None:
+            return
+        _record_stats(stats, self.output_file)
+        if self.output_file:
+            stats.dump_stats(self.output_file)
+        else:
+            stats.stream = sys.stdout
+            stats.sort_stats("cumulative").print_stats(self.top)
+
+    def _emit_every(self, interval):
+        while not self._stop.wait(interval):
+            self.emit()
@@ -0,0 +1,104 @@
+import linecache
+import tracemalloc
+from functools import wraps
+
+from instrumentation import metrics
+from size import Size
+
+# Allocations made by the import system or the profiler itself are noise
+_FILTERS = (
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, linecache.__file__),
+    tracemalloc.Filter(False, __file__),
+)
+
+
+def _signed(size_in_bytes: int) -> str:
+    return f"{'+' if size_in_bytes >= 0 else ''}{Size(size_in_bytes)}"
+
+
+class MemProfiler:
+    """Context manager and decorator for profiling memory using tracemalloc.
+
+    Reports the peak traced memory of the block, the allocation sites holding the most
+    memory at exit and the sites which grew the most between entry and exit. Memory
+    allocated by numpy (e.g. frames returned by `cv2.VideoCapture.read`) is traced too.
+
+    ### Example:
+    ------------
+    >>> with MemProfiler(output_file="memory.txt"):
+            frames = video_to_ndarray("video.mp4")
+
+    >>> @MemProfiler(top=5)
+        def create_frame_index(path):
+            ...
+    """
+
+    def __init__(self, output_file=None, top=10):
+        """Initialize the profiler.
+
+        ### Parameters:
+        -----------------
+            - `output_file (str | None)`: Path to also write the report to.
+            - `top (int)`: Number of allocation sites to list.
+        """
+        self.output_file = output_file
+        self.top = top
+        self.peak = 0
+        self.growth = 0
+        self._started = False
+
+    def __enter__(self):
+        self._started = not tracemalloc.is_tracing()
+        if self._started:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        self._start_snapshot = tracemalloc.take_snapshot().filter_traces(_FILTERS)
+        self._start_current, _ = tracemalloc.get_traced_memory()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces(_FILTERS)
+        if self._started:
+            tracemalloc.stop()
+        self.peak = peak - self._start_current
+        self.growth = current - self._start_current
+        if metrics.enabled:
+            metrics.gauge("mem_profiler_peak_bytes", self.peak, output_file=self.output_file or "")
+            metrics.gauge(
+                "mem_profiler_growth_bytes", self.growth, output_file=self.output_file or ""
+            )
+
+        report = self.report(snapshot)
+        print(report)
+        if self.output_file:
+            with open(self.output_file, "w") as f:
+                f.write(report + "\n")
+
+    def __call__(self, func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with self:
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    def report(self, snapshot: tracemalloc.Snapshot) -> str:
+        """Format the peak, growth and top allocation sites of the profiled block."""
+        lines = [f"Peak: {Size(self.peak)}", f"Growth: {_signed(self.growth)}", ""]
+
+        lines.append(f"Top {self.top} allocation sites at exit:")
+        for stat in snapshot.statistics("lineno")[: self.top]:
+            lines.append(f"{Size(stat.size)!s:>12} {stat.count:>9} blocks  {stat.traceback}")
+
+        lines.extend(("", f"Top {self.top} growth since entry:"))
+        for diff in snapshot.compare_to(self._start_snapshot, "lineno")[: self.top]:
+            if not diff.size_diff:
+                break
+            lines.append(
+                f"{_signed(diff.size_diff):>12} {diff.count_diff:>+9} blocks  {diff.traceback}"
+            )
+        return "\n".join(lines)
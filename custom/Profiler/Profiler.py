@@ -1,25 +1,92 @@
 import cProfile
 import io
 import pstats
+import sys
+import threading
+
+from instrumentation import metrics
+
+# From 3.12 cProfile is built on `sys.monitoring`: a single profiler sees every thread,
+# and enabling a second one raises "Another profiling tool is already active"
+_SHARED_PROFILER = sys.version_info >= (3, 12)
+
+
+class _ActiveProfiler:
+    """The cProfile profiler enabled by this package, with a count of blocks using it.
+
+    Only one profiler can run at a time, process-wide on 3.12+ and per thread before
+    (a second `sys.setprofile` silently replaces the first). A profiled block entered
+    while another one is running is recorded by the running profiler instead of
+    enabling its own, so profiled functions can call each other.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._shared: list = [None, 0]
+        self._local = threading.local()
+
+    def _slot(self) -> list:
+        if _SHARED_PROFILER:
+            return self._shared
+        if not hasattr(self._local, "slot"):
+            self._local.slot = [None, 0]
+        return self._local.slot
+
+    def enter(self, profiler: cProfile.Profile) -> bool:
+        """Enable `profiler` unless another one is running. Returns whether it was enabled."""
+        with self._lock:
+            slot = self._slot()
+            if slot[0] is None:
+                profiler.enable()
+                slot[0] = profiler
+            slot[1] += 1
+            return slot[0] is profiler
+
+    def exit(self) -> None:
+        """Leave a block, disabling the running profiler when it was the last one."""
+        with self._lock:
+            slot = self._slot()
+            slot[1] -= 1
+            if not slot[1]:
+                slot[0].disable()
+                slot[0] = None
+
+
+_active = _ActiveProfiler()
+
+
+def _record_stats(stats: pstats.Stats, output_file: str | None) -> None:
+    """Export the call count and total time of a profile as gauges, if metrics are enabled."""
+    if metrics.enabled:
+        metrics.gauge("profiler_calls", stats.total_calls, output_file=output_file or "")
+        metrics.gauge("profiler_seconds", stats.total_tt, output_file=output_file or "")
 
 
 class Profiler:
-    """Context manager for profiling code using cProfile."""
+    """Context manager for profiling code using cProfile.
+
+    Inside a block (or decorated function) profiled by another profiler of this package,
+    nothing is reported and the block's calls are recorded by the enclosing profiler.
+    """
 
     def __init__(self, output_file=None):
         self.profiler = cProfile.Profile()
         self.output_file = output_file
 
     def __enter__(self):
-        self.profiler.enable()
+        self._enabled = _active.enter(self.profiler)
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.profiler.disable()
+        _active.exit()
+        if not self._enabled:
+            print("Profiled by the enclosing profiler")
+            return
         sio = io.StringIO()
         stats = pstats.Stats(self.profiler, stream=sio).sort_stats("cumulative")
         stats.print_stats()
         print(sio.getvalue())
+        _record_stats(stats, self.output_file)
 
         if self.output_file:
             with open(self.output_file, "w") as f:
@@ -0,0 +1,137 @@
+import os
+import sys
+import threading
+from collections import Counter
+from functools import wraps
+from types import FrameType
+
+from instrumentation import metrics
+
+
+class SamplingProfiler:
+    """Low overhead statistical profiler which samples the stacks of every thread.
+
+    A background thread wakes up every `interval` seconds and records the current
+    stack of all other threads (including `Pool` workers). Unlike cProfile, the
+    profiled code runs at full speed between samples, so it can be left enabled on
+    production workloads.
+
+    Stacks are aggregated in the collapsed format (`frame;frame;frame count`) read by
+    flamegraph.pl, speedscope and inferno, and written to `output_file`.
+
+    ### Example:
+    ------------
+    >>> with SamplingProfiler(output_file="profile.folded"):
+            main()
+
+    >>> @SamplingProfiler(interval=0.001)
+        def my_method():
+            return
+    """
+
+    def __init__(self, output_file=None, interval=0.005, top=20):
+        """Initialize the profiler.
+
+        ### Parameters:
+        -----------------
+            - `output_file (str | None)`: Path to write the collapsed stacks to.
+            - `interval (float)`: Seconds between samples.
+            - `top (int)`: Number of functions printed in the summary. 0 disables it.
+        """
+        self.output_file = output_file
+        self.interval = interval
+        self.top = top
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self._active = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def __call__(self, func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with self:
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    def start(self) -> None:
+        """Start sampling. Nested and concurrent starts share one sampler thread."""
+        with self._lock:
+            self._active += 1
+            if self._active > 1:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._sample, name="SamplingProfiler", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling once the outermost `start` is matched and report the results."""
+        with self._lock:
+            self._active -= 1
+            if self._active > 0:
+                return
+            self._stop.set()
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join()
+        self.report()
+
+    def _sample(self) -> None:
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            if len(names) != threading.active_count():
+                names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in frames.items():
+                if ident == own:
+                    continue
+                self.stacks[self._collapse(names.get(ident, str(ident)), frame)] += 1
+            self.samples += 1
+
+    @staticmethod
+    def _collapse(thread_name: str, frame: FrameType | None) -> str:
+        labels = []
+        while frame is not None:
+            code = frame.f_code
+            filename = os.path.basename(code.co_filename)
+            labels.append(f"{code.co_name} ({filename}:{code.co_firstlineno})")
+            frame = frame.f_back
+        labels.append(thread_name)
+        return ";".join(reversed(labels))
+
+    def report(self) -> None:
+        """Print the hottest functions and write the collapsed stacks to `output_file`."""
+        if metrics.enabled:
+            metrics.gauge(
+                "sampling_profiler_samples", self.samples, output_file=self.output_file or ""
+            )
+        if self.top:
+            own, total = Counter(), Counter()
+            for stack, count in self.stacks.items():
+                frames = stack.split(";")[1:]
+                if frames:
+                    own[frames[-1]] += count
+                for frame in set(frames):
+                    total[frame] += count
+            samples = sum(self.stacks.values()) or 1
+            print(f"{self.samples} samples every {self.interval * 1000:g} ms")
+            print(f"{'self %':>8} {'total %':>8}  function")
+            for frame, count in own.most_common(self.top):
+                print(f"{count / samples:>8.1%} {total[frame] / samples:>8.1%}  {frame}")
+
+        if self.output_file:
+            with open(self.output_file, "w") as f:
+                for stack, count in self.stacks.most_common():
+                    f.write(f"{stack} {count}\n")
@@ -1,5 +1,7 @@
 from .ClassProfiler import ClassProfiler as cProfiler
 from .FunctionProfiler import FuncProfiler as fProfiler
+from .MemProfiler import MemProfiler as mProfiler
 from .Profiler import Profiler as Profiler
+from .SamplingProfiler import SamplingProfiler as sProfiler
 
-__all__ = ["Profiler", "cProfiler", "fProfiler"]
+__all__ = ["Profiler", "cProfiler", "fProfiler", "mProfiler", "sProfiler"]
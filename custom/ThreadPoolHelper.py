@@ -1,33 +1,545 @@
+import asyncio
+import atexit
+import inspect
+import json
 import os
-from collections.abc import Callable, Generator, Iterable, Sized
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Any, Concatenate, ParamSpec, TypeVar
+import pickle
+import random
+import subprocess
+import threading
+import warnings
+from collections import deque
+from collections.abc import (
+    AsyncGenerator,
+    Awaitable,
+    Callable,
+    Generator,
+    Iterable,
+    Iterator,
+    Mapping,
+    Sequence,
+    Sized,
+)
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+    wait,
+)
+from contextlib import AbstractContextManager, nullcontext
+from dataclasses import dataclass, field
+from itertools import islice
+from time import perf_counter, sleep, time
+from types import TracebackType
+from typing import Any, Concatenate, Literal, ParamSpec, Self, TypeVar
 
 from tqdm import tqdm
 
+from instrumentation import metrics
+
 DataT = TypeVar("DataT")
 P = ParamSpec("P")
 R = TypeVar("R")
 
+Backend = Literal["thread", "process", "auto"]
+Outcome = tuple[bool, Any, float]
+
+_TEMPLATE = "\033[31m{}: \033[0m{name}({item}, {args}, {kwargs})"
+
+
+def report_failure(
+    e: Exception,
+    function: Callable[..., Any],
+    item: Any,
+    args: tuple,
+    kwargs: dict,
+    *,
+    quiet: bool = False,
+) -> None:
+    """Attach the failing call to `e.details` and print it unless `quiet`."""
+    details = {
+        "name": getattr(function, "__name__", repr(function)),
+        "args": args,
+        "kwargs": kwargs,
+        "item": str(item),
+    }
+    e.__setattr__("details", details)
+    if not quiet:
+        print(f"\n{e!r}", _TEMPLATE.format(e.__class__.__name__, **details))
+
+
+def run_chunk(
+    function: Callable[..., Any],
+    chunk: list[Any],
+    args: tuple,
+    kwargs: dict,
+    started: list[float] | None = None,
+) -> list[Outcome]:
+    """Run `function` over every item of `chunk` inside a single worker task.
+
+    Exceptions are returned instead of raised so that one failing item does
+    not discard the results of the rest of the chunk. Each outcome carries the
+    time the call took, in seconds. If given, `started` receives the time the
+    task started running, for timeouts.
+    """
+    if started is not None:
+        started.append(perf_counter())
+    outcomes = []
+    for item in chunk:
+        start = perf_counter()
+        try:
+            result = function(item, *args, **kwargs)
+        except Exception as e:
+            outcomes.append((False, e, perf_counter() - start))
+        else:
+            outcomes.append((True, result, perf_counter() - start))
+    return outcomes
+
+
+ExecutorKey = tuple[type[Executor], int]
+
+_shared_executors: dict[ExecutorKey, Executor] = {}
+_shared_lock = threading.Lock()
+
+
+@atexit.register
+def _shutdown_shared_executors() -> None:
+    """Shut down the executors used by `Pool(shared=True)` when the interpreter exits."""
+    with _shared_lock:
+        for executor in _shared_executors.values():
+            executor.shutdown(wait=True, cancel_futures=True)
+        _shared_executors.clear()
+
+
+class _Retrying:
+    """Wrap a function so that transient errors are retried with exponential backoff.
+
+    The exception of the final attempt is raised with an `attempts` attribute.
+    """
+
+    def __init__(
+        self,
+        function: Callable[..., Any],
+        retries: int,
+        retry_on: tuple[type[Exception], ...],
+        backoff: float,
+    ) -> None:
+        self.function = function
+        self.retries = retries
+        self.retry_on = retry_on
+        self.backoff = backoff
+
+    def __call__(self, item: Any, *args: Any, **kwargs: Any) -> Any:
+        for attempt in range(self.retries + 1):
+            try:
+                return self.function(item, *args, **kwargs)
+            except self.retry_on as e:
+                if attempt == self.retries:
+                    e.__setattr__("attempts", attempt + 1)
+                    raise
+                sleep(self.backoff * 2**attempt)
+        return None
+
+
+def _chunked(data_source: Iterable[Any], chunksize: int) -> Iterator[list[Any]]:
+    """Lazily split `data_source` into lists of at most `chunksize` items."""
+    iterator = iter(data_source)
+    while chunk := list(islice(iterator, chunksize)):
+        yield chunk
+
+
+def _picklable(*objects: Any) -> bool:
+    """Check whether `objects` can be sent to a worker process."""
+    try:
+        pickle.dumps(objects)
+    except Exception:  # Lambdas and closures raise PicklingError, AttributeError or TypeError
+        return False
+    return True
+
+
+class ProgressSink:
+    """Receives progress updates from `Pool.execute` and `AsyncPool.execute`.
+
+    The base class ignores every update and is used when `progress_bar=False`.
+    Subclasses override any of `open`, `update` and `close`, which are always
+    called from the thread consuming the results.
+    """
+
+    def open(self, total: int | None) -> None:
+        """Called before the first task is submitted."""
+
+    def update(self, completed: int, latencies: Sequence[float], pending: int) -> None:
+        """Called with the number of newly completed items, how long each took and
+        the number of tasks still in flight."""
+
+    def close(self) -> None:
+        """Called once the run has finished, failed or been interrupted."""
+
+
+class TqdmProgress(ProgressSink):
+    """A tqdm progress bar which is updated at most once every `interval` seconds.
+
+    Completions are counted locally in between, so the bar's lock and the terminal
+    redraw are paid per interval rather than per task.
+    """
+
+    def __init__(self, interval: float = 0.2, **tqdm_kwargs: Any) -> None:
+        self.interval = interval
+        self.tqdm_kwargs = tqdm_kwargs
+
+    def open(self, total: int | None) -> None:
+        self.bar = tqdm(total=total, **self.tqdm_kwargs)
+        self.count = 0
+        self.next_flush = perf_counter() + self.interval
+
+    def update(self, completed: int, latencies: Sequence[float], pending: int) -> None:
+        self.count += completed
+        if (now := perf_counter()) >= self.next_flush:
+            self.bar.update(self.count)
+            self.count = 0
+            self.next_flush = now + self.interval
+
+    def close(self) -> None:
+        self.bar.update(self.count)
+        self.count = 0
+        self.bar.close()
+
+
+class StatsProgress(ProgressSink):
+    """Headless sink which emits throughput statistics every `interval` seconds.
+
+    Each record is a dict with the completed count, the expected total, items/s over
+    the last interval and overall, p50/p95 task latency in seconds and the number of
+    tasks in flight. Records are passed to `callback` and/or appended to `file` as
+    JSON lines, which makes it suitable for cron jobs without a TTY.
+
+    Attributes:
+        callback (Callable | None): Called with each record.
+        file (str | None): Path of a JSON lines file to append records to.
+        interval (float): Seconds between records. A final record is always emitted on close.
+        max_samples (int): Latencies kept per interval. Further samples are reservoir sampled.
+    """
+
+    def __init__(
+        self,
+        callback: Callable[[dict[str, Any]], None] | None = None,
+        file: str | None = None,
+        interval: float = 5.0,
+        max_samples: int = 10_000,
+    ) -> None:
+        self.callback = callback
+        self.file = file
+        self.interval = interval
+        self.max_samples = max_samples
+
+    def open(self, total: int | None) -> None:
+        self.total = total
+        self.completed = 0
+        self.pending = 0
+        self.started = self.last_emit = perf_counter()
+        self.interval_completed = 0
+        self.samples: list[float] = []
+        self.seen = 0
+
+    def update(self, completed: int, latencies: Sequence[float], pending: int) -> None:
+        self.completed += completed
+        self.interval_completed += completed
+        self.pending = pending
+        for latency in latencies:
+            self.seen += 1
+            if len(self.samples) < self.max_samples:
+                self.samples.append(latency)
+            elif (i := random.randrange(self.seen)) < self.max_samples:
+                self.samples[i] = latency
+        if perf_counter() - self.last_emit >= self.interval:
+            self._emit()
+
+    def close(self) -> None:
+        self._emit()
+
+    def _emit(self) -> None:
+        now = perf_counter()
+        samples = sorted(self.samples)
+
+        def percentile(q: float) -> float | None:
+            return samples[min(len(samples) - 1, int(q * len(samples)))] if samples else None
+
+        record = {
+            "timestamp": time(),
+            "completed": self.completed,
+            "total": self.total,
+            "items_per_s": self.interval_completed / max(now - self.last_emit, 1e-9),
+            "overall_items_per_s": self.completed / max(now - self.started, 1e-9),
+            "p50": percentile(0.50),
+            "p95": percentile(0.95),
+            "pending": self.pending,
+        }
+        if self.callback is not None:
+            self.callback(record)
+        if self.file is not None:
+            with open(self.file, "a") as f:
+                f.write(json.dumps(record) + "\n")
+
+        self.last_emit = now
+        self.interval_completed = 0
+        self.samples = []
+        self.seen = 0
+
+
+def progress_sink(progress_bar: bool | ProgressSink) -> ProgressSink:
+    """Return the sink for an `execute` call's `progress_bar` argument."""
+    if isinstance(progress_bar, ProgressSink):
+        return progress_bar
+    return TqdmProgress() if progress_bar else ProgressSink()
+
+
+def function_name(function: Callable[..., Any]) -> str:
+    """Name used for `function` in metrics labels."""
+    return getattr(function, "__qualname__", repr(function))
+
+
+def record_run(function: Callable[..., Any], report: "PoolReport", seconds: float) -> None:
+    """Report the totals of a finished run to `metrics` (only called when enabled)."""
+    name = function_name(function)
+    metrics.observe("pool_execute_seconds", seconds, function=name)
+    metrics.count("pool_tasks_total", report.succeeded, function=name, status="ok")
+    metrics.count(
+        "pool_tasks_total", report.failed - report.timed_out, function=name, status="failed"
+    )
+    metrics.count("pool_tasks_total", report.timed_out, function=name, status="timeout")
+
+
+@dataclass
+class Failure:
+    """An item whose task raised an exception."""
+
+    item: Any
+    exception: Exception
+
+    @property
+    def attempts(self) -> int:
+        return getattr(self.exception, "attempts", 1)
+
+
+@dataclass
+class PoolReport:
+    """Summary of the most recent `execute` call, available as `pool.report`.
+
+    Attributes:
+        succeeded (int): Number of items whose results were yielded.
+        failures (list[Failure]): Every item that failed, including timeouts.
+        interrupted (bool): True if the run was stopped by a `KeyboardInterrupt`, which is
+            re-raised after pending tasks are cancelled.
+    """
+
+    succeeded: int = 0
+    failures: list[Failure] = field(default_factory=list)
+    interrupted: bool = False
+
+    @property
+    def failed(self) -> int:
+        return len(self.failures)
+
+    @property
+    def timed_out(self) -> int:
+        return sum(isinstance(f.exception, TimeoutError) for f in self.failures)
+
+
+class _Window:
+    """A fixed limit on the number of tasks in flight."""
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+
+    def record(self, completed: int) -> None:
+        """Called with the number of tasks that just completed."""
+
+
+class _AdaptiveWindow(_Window):
+    """Hill-climb the number of tasks in flight toward the best completion rate.
+
+    Every `interval` seconds the completion rate is compared with the previous one.
+    The window keeps moving in the same direction while throughput improves and
+    reverses once it drops, e.g. when extra readers start thrashing an HDD.
+    """
+
+    def __init__(self, size: int, maximum: int, interval: float = 1.0) -> None:
+        super().__init__(min(size, maximum))
+        self.maximum = maximum
+        self.interval = interval
+        self.direction = 1
+        self.last_rate = 0.0
+        self.completed = 0
+        self.started = perf_counter()
+
+    def record(self, completed: int) -> None:
+        self.completed += completed
+        elapsed = perf_counter() - self.started
+        if elapsed < self.interval:
+            return
+
+        rate = self.completed / elapsed
+        # Ignore noise of a few percent so the window doesn't oscillate on a plateau
+        if rate < self.last_rate * 0.95:
+            self.direction = -self.direction
+        step = max(1, self.size // 4) * self.direction
+        self.size = max(1, min(self.maximum, self.size + step))
+        self.last_rate = rate
+        self.completed = 0
+        self.started = perf_counter()
+
+
+def _path_of(item: Any) -> str | bytes | None:
+    """Best effort lookup of the filesystem path an item refers to."""
+    if isinstance(item, str | bytes | os.PathLike):
+        return os.fspath(item)
+    path = getattr(item, "path", None)
+    return os.fspath(path) if isinstance(path, str | bytes | os.PathLike) else None
+
+
+class _DeviceLimiter:
+    """Wrap a function so that calls on the same storage device (`st_dev`) are capped.
+
+    `limits` is either a cap applied to every device or a mapping of device ids or
+    paths on that device to caps. Items without a path, or on devices missing from
+    the mapping, are not limited.
+    """
+
+    def __init__(
+        self, function: Callable[..., Any], limits: int | Mapping[int | str, int]
+    ) -> None:
+        self.function = function
+        self.default = limits if isinstance(limits, int) else None
+        self.limits = (
+            {}
+            if isinstance(limits, int)
+            else {
+                key if isinstance(key, int) else os.stat(key).st_dev: value
+                for key, value in limits.items()
+            }
+        )
+        self._semaphores: dict[int, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, item: Any, *args: Any, **kwargs: Any) -> Any:
+        with self._semaphore(item):
+            return self.function(item, *args, **kwargs)
+
+    def _semaphore(self, item: Any) -> AbstractContextManager:
+        path = _path_of(item)
+        try:
+            device = os.stat(path).st_dev if path is not None else None
+        except OSError:
+            device = None
+        limit = self.limits.get(device, self.default) if device is not None else None
+        if limit is None:
+            return nullcontext()
+        with self._lock:
+            return self._semaphores.setdefault(device, threading.BoundedSemaphore(limit))
+
 
 class Pool:
-    """A helper class to manage a thread pool for executing tasks concurrently.
+    """A helper class to manage a thread or process pool for executing tasks concurrently.
 
     Attributes:
         suppress_exceptions (bool): If True, exceptions raised by worker functions will be suppressed.
+        max_pending (int | None): Maximum number of submitted tasks which have not yet been yielded.
+            When set, `execute` streams the data source lazily instead of converting it to a list.
+        backend (str): Executor used to run tasks:
+            - `"thread"`: A `ThreadPoolExecutor` (default). Best for I/O bound work.
+            - `"process"`: A `ProcessPoolExecutor`. Best for CPU bound, pure Python work.
+            - `"auto"`: Processes when the function and its arguments can be pickled and more than
+                one CPU is available, threads otherwise.
+        max_workers (int | None): Number of workers. Defaults to the executor's own default.
+        adaptive (bool): If True, the number of tasks in flight is tuned at runtime toward the
+            highest completion rate, bounded by `max_workers` and `max_pending`.
+        device_limit (int | Mapping | None): Cap on concurrent calls per storage device, looked up
+            from the item's path (`str`, `PathLike` or a `.path` attribute). Either a single cap for
+            every device or a mapping of `st_dev` ids or paths to caps. Thread backend only.
+        timeout (float | None): Seconds a task may run, counted from when a worker picks it up,
+            before it is reported as a `TimeoutError`. Threads cannot be killed, so a timed out task keeps its
+            worker busy until it returns but its result is discarded.
+        retries (int): Number of times a task raising one of `retry_on` is retried.
+        retry_on (tuple[type[Exception], ...]): Exceptions considered transient.
+        backoff (float): Delay before the first retry, doubled on each further attempt.
+        shared (bool): If True, executors are shared by every `Pool` in the process and kept warm
+            between `execute` calls until the interpreter exits.
+        report (PoolReport): Successes and failures of the most recent `execute` call.
+
+    Used as a context manager, the pool keeps its own executors alive for the duration of
+    the `with` block instead of starting and stopping one per `execute` call:
+
+    >>> with Pool() as pool:
+            sizes = list(pool.execute(get_size, files))
+            hashes = list(pool.execute(get_hash, files))
     """
 
-    def __init__(self, *, suppress_exceptions: bool = False):
-        """Initialize the thread pool with a specified number of threads."""
+    def __init__(
+        self,
+        *,
+        suppress_exceptions: bool = False,
+        max_pending: int | None = None,
+        backend: Backend = "thread",
+        max_workers: int | None = None,
+        adaptive: bool = False,
+        device_limit: int | Mapping[int | str, int] | None = None,
+        timeout: float | None = None,
+        retries: int = 0,
+        retry_on: tuple[type[Exception], ...] = (OSError,),
+        backoff: float = 0.5,
+        shared: bool = False,
+    ):
+        """Initialize the pool with the specified backend and number of workers."""
+        if max_pending is not None and max_pending < 1:
+            raise ValueError("max_pending must be a positive integer")
+        if backend not in {"thread", "process", "auto"}:
+            raise ValueError(f"Unknown backend: {backend!r}")
+        if device_limit is not None and backend == "process":
+            raise ValueError("device_limit requires the thread backend")
+        if retries < 0:
+            raise ValueError("retries must not be negative")
         self.suppress_exceptions = suppress_exceptions
+        self.max_pending = max_pending
+        self.backend = backend
+        self.max_workers = max_workers
+        self.adaptive = adaptive
+        self.device_limit = device_limit
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_on = retry_on
+        self.backoff = backoff
+        self.shared = shared
+        self.report = PoolReport()
+        self._executors: dict[ExecutorKey, Executor] | None = None
+
+    def __enter__(self) -> Self:
+        """Keep executors alive and reuse them across `execute` calls until exit."""
+        self._executors = {}
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        executors, self._executors = self._executors or {}, None
+        for executor in executors.values():
+            executor.shutdown(wait=exc_type is None, cancel_futures=True)
 
     def execute(
         self,
         function: Callable[Concatenate[DataT, P], R],
         data_source: Iterable[Any],
         /,
-        progress_bar: bool = True,
+        progress_bar: bool | ProgressSink = True,
         *args: P.args,
+        total: int | None = None,
+        ordered: bool = False,
+        chunksize: int | None = None,
         **kwargs: P.kwargs,
     ) -> Generator[R]:
         """Execute a callable function concurrently for each item in the data source.
@@ -36,51 +548,482 @@ class Pool:
         --------------
             - `function (Callable)`: The function to be executed for each item in the data source.
             - `data_source (Iterable)`: An iterable containing the data to be processed by the specified function.
-            - `progress_bar (bool): If False, no progress bar will be displayed.
+            - `progress_bar (bool | ProgressSink)`: If False, no progress bar will be displayed.
+                A `ProgressSink` such as `StatsProgress` replaces the default `TqdmProgress`.
+            - `total (int | None)`: Number of items used for the progress bar. Defaults to `len(data_source)`
+                when the data source is sized.
+            - `ordered (bool)`: If True, results are yielded in input order instead of completion order.
+                Out of order results are held in a reorder buffer bounded by `max_pending`.
+            - `chunksize (int | None)`: Number of items each worker task processes. Defaults to 1 for
+                threads and to an automatic size for processes. Larger chunks amortize the per-task
+                overhead of cheap functions.
             - `*args` | `**kwargs`: Additional arguments to pass to the specified function.
 
         ### Returns:
         --------------
             - `Generator` that yields results from the specified function executions.
 
-        Note: If data_source a generator, it will be converted to a list.
+        Note: If data_source a generator and `max_pending` is not set, it will be converted to a list.
+        With `max_pending` set, items are pulled from the data source only as tasks complete so memory
+        stays flat regardless of the size of the input.
+
+        With the process backend or `chunksize` > 1, items are sent to the workers in chunks and
+        `max_pending` counts chunks rather than items.
+
+        Pending tasks are cancelled as soon as the generator is closed or interrupted. Failures
+        are collected in `pool.report`, which is also the return value of the generator.
         """
-        if not isinstance(data_source, Sized):
+        if chunksize is not None and chunksize < 1:
+            raise ValueError("chunksize must be a positive integer")
+        if self.max_pending is None and not isinstance(data_source, Sized):
             # Convert generators to lists as calling `len` on a generator depletes it
             data_source = list(data_source)
+        if total is None and isinstance(data_source, Sized):
+            total = len(data_source)
 
-        exceptions = []
-        template = "\033[31m{}: \033[0m{name}({item}, {args}, {kwargs})"
+        report = self.report = PoolReport()
 
-        with ThreadPoolExecutor() as executor:
-            futures = {
-                executor.submit(function, item, *args, **kwargs): item
-                for item in data_source
-            }
+        if self._resolve_backend(function, args, kwargs) == "process":
+            executor_cls = ProcessPoolExecutor
+            workers = self.max_workers or os.cpu_count() or 1
+            # Same heuristic as `multiprocessing.Pool.map`
+            chunksize = chunksize or max(1, -(-(total or 0) // (workers * 4)))
+        else:
+            executor_cls = ThreadPoolExecutor
+            workers = self.max_workers or min(32, (os.cpu_count() or 1) + 4)
+            chunksize = chunksize or 1
+
+        if self.adaptive:
+            window = _AdaptiveWindow(2, min(workers, self.max_pending or workers))
+        elif self.max_pending is not None:
+            window = _Window(self.max_pending)
+        elif self.timeout is not None:
+            # Running tasks are checked against their deadline while waiting on the window
+            window = _Window(workers)
+        elif ordered:
+            window = _Window(workers * 4)
+        else:
+            window = None
+        tasks = _chunked(data_source, chunksize)
+        worker = function
+        if self.device_limit is not None and executor_cls is ThreadPoolExecutor:
+            worker = _DeviceLimiter(worker, self.device_limit)
+        if self.retries:
+            worker = _Retrying(worker, self.retries, self.retry_on, self.backoff)
+
+        executor, owned = self._executor(executor_cls, workers)
+        # Unfinished futures in submission order, including ones which timed out
+        live: dict[Future, None] = {}
+        # Start times reported by thread workers, for timeouts
+        clocks: dict[Future, list[float]] = {}
+        timed_threads = self.timeout is not None and executor_cls is ThreadPoolExecutor
+
+        def submit(chunk: list[Any]) -> Future:
+            if timed_threads:
+                clock: list[float] = []
+                future = executor.submit(run_chunk, worker, chunk, args, kwargs, clock)
+                clocks[future] = clock
+            else:
+                future = executor.submit(run_chunk, worker, chunk, args, kwargs)
+            live[future] = None
+            future.add_done_callback(forget)
+            return future
+
+        def forget(future: Future) -> None:
+            live.pop(future, None)
+            clocks.pop(future, None)
+
+        def started_at(future: Future) -> float | None:
+            if timed_threads:
+                clock = clocks.get(future)
+                return clock[0] if clock else None
+            # Process workers can't report back before they finish, and the executor marks
+            # queued tasks as running early. Tasks are picked up in submission order, so
+            # a task has started once fewer than `workers` older ones are unfinished.
+            return perf_counter() if future in list(live)[:workers] else None
+
+        progress = progress_sink(progress_bar)
+        progress.open(total)
+        started = perf_counter()
+        try:
+            for future, chunk, pending in self._completed(
+                submit,
+                tasks,
+                window,
+                ordered,
+                self.timeout,
+                started_at,
+            ):
+                if not future.done():
+                    future.cancel()
+                    outcomes = [
+                        (False, TimeoutError(f"Task exceeded {self.timeout}s"), self.timeout)
+                        for _ in chunk
+                    ]
+                else:
+                    try:
+                        outcomes = future.result()
+                    except Exception as e:
+                        # The chunk itself failed, e.g. an item could not be pickled
+                        outcomes = [(False, e, 0.0)] * len(chunk)
+
+                progress.update(len(chunk), [latency for *_, latency in outcomes], pending)
+                if metrics.enabled:
+                    name = function_name(function)
+                    for *_, latency in outcomes:
+                        metrics.observe("pool_task_seconds", latency, function=name)
+                for item, (ok, value, _) in zip(chunk, outcomes):
+                    if ok:
+                        report.succeeded += 1
+                        yield value
+                    elif isinstance(value, StopIteration):
+                        return report
+                    else:
+                        report_failure(
+                            value,
+                            function,
+                            item,
+                            args,
+                            kwargs,
+                            quiet=self.suppress_exceptions,
+                        )
+                        report.failures.append(Failure(item, value))
+        except KeyboardInterrupt:
+            report.interrupted = True
+            raise
+        finally:
+            progress.close()
+            # Drop queued tasks and don't block on ones that timed out or were interrupted
+            for future in list(live):
+                future.cancel()
+            if owned:
+                executor.shutdown(
+                    wait=not (report.interrupted or report.timed_out), cancel_futures=True
+                )
+            if metrics.enabled:
+                record_run(function, report, perf_counter() - started)
+        return report
+
+    def _executor(
+        self, executor_cls: type[Executor], workers: int
+    ) -> tuple[Executor, bool]:
+        """Return an executor for this run and whether the run owns (and must shut down) it."""
+        key = (executor_cls, workers)
+        if self._executors is not None:
+            if key not in self._executors:
+                self._executors[key] = executor_cls(max_workers=workers)
+            return self._executors[key], False
+        if self.shared:
+            with _shared_lock:
+                if key not in _shared_executors:
+                    _shared_executors[key] = executor_cls(max_workers=workers)
+                return _shared_executors[key], False
+        return executor_cls(max_workers=workers), True
+
+    def _resolve_backend(
+        self, function: Callable[..., Any], args: tuple, kwargs: dict
+    ) -> Literal["thread", "process"]:
+        """Pick the executor for `function`, falling back to threads if it cannot be pickled."""
+        if self.backend == "thread" or (
+            self.backend == "auto"
+            and (self.device_limit is not None or (os.cpu_count() or 1) < 2)
+        ):
+            return "thread"
+        if _picklable(function, args, kwargs):
+            return "process"
+        if self.backend == "process":
+            warnings.warn(
+                f"{getattr(function, '__name__', function)!r} cannot be pickled, "
+                "falling back to the thread backend",
+                RuntimeWarning,
+                stacklevel=3,
+            )
+        return "thread"
+
+    @staticmethod
+    def _completed(
+        submit: Callable[[Any], Future],
+        tasks: Iterable[Any],
+        window: _Window | None,
+        ordered: bool = False,
+        timeout: float | None = None,
+        started: Callable[[Future], float | None] | None = None,
+    ) -> Iterator[tuple[Future, Any, int]]:
+        """Submit `tasks` and yield `(future, task, in_flight)` as they complete.
+
+        When `window` is set, at most `window.size` tasks are submitted but not yet yielded,
+        and `tasks` is only advanced when a slot frees up. With `ordered`, pairs are
+        yielded in submission order, so the window doubles as the reorder buffer.
+
+        With a `timeout` (which requires a `window`), futures still running `timeout` seconds
+        after they started are yielded unfinished and it is up to the caller to check
+        `future.done()`. Tasks queued behind busy workers don't time out. `started`, which
+        is required with a `timeout`, returns the `perf_counter` time a future started
+        running, or None while it is still queued.
+        """
+        if window is None:
+            futures = {submit(task): task for task in tasks}
+            for future in as_completed(futures):
+                yield future, futures.pop(future), len(futures)
+            return
+
+        iterator = iter(tasks)
+        deadlines: dict[Future, float] = {}
+        start = submit
+
+        def deadline(future: Future) -> float | None:
+            if future not in deadlines:
+                if (at := started(future)) is None:
+                    return None
+                deadlines[future] = at + timeout
+            return deadlines[future]
+
+        def remaining(futures: Iterable[Future]) -> float | None:
+            if timeout is None:
+                return None
+            now = perf_counter()
+            # Tasks which haven't started yet can't expire before `now + timeout`
+            known = (d for f in futures if (d := deadline(f)) is not None)
+            return max(0.0, min(known, default=now + timeout) - now)
+
+        def expired(future: Future, now: float) -> bool:
+            at = deadline(future)
+            return at is not None and at <= now
+
+        if ordered:
+            queue = deque((start(task), task) for task in islice(iterator, window.size))
+            while queue:
+                future, task = queue.popleft()
+                while not future.done():
+                    wait((future,), timeout=remaining((future,)))
+                    if timeout is not None and expired(future, perf_counter()):
+                        break
+                deadlines.pop(future, None)
+                window.record(1)
+                free = max(0, window.size - len(queue))
+                queue.extend((start(t), t) for t in islice(iterator, free))
+                yield future, task, len(queue)
+            return
+
+        pending = {start(task): task for task in islice(iterator, window.size)}
+        while pending:
+            done, _ = wait(pending, timeout=remaining(pending), return_when=FIRST_COMPLETED)
+            if timeout is not None:
+                now = perf_counter()
+                done |= {f for f in pending if expired(f, now)}
+                for future in done:
+                    deadlines.pop(future, None)
+                if not done:
+                    # Woke up to check tasks which started after the wait began
+                    continue
+            window.record(len(done))
+            completed = [(future, pending.pop(future)) for future in done]
+            # Refill the window before handing results back so workers stay busy
+            for task in islice(iterator, max(0, window.size - len(pending))):
+                pending[start(task)] = task
+            for future, task in completed:
+                yield future, task, len(pending)
+
+
+async def run_subprocess(
+    *cmd: str, timeout: float | None = None, check: bool = False
+) -> subprocess.CompletedProcess[str]:
+    """Run `cmd` without blocking the event loop and capture its output.
+
+    ### Parameters:
+    --------------
+        - `*cmd (str)`: The program and its arguments. No shell is involved.
+        - `timeout (float | None)`: Seconds to wait before killing the process.
+        - `check (bool)`: If True, raise `CalledProcessError` on a non-zero exit code.
+
+    ### Returns:
+    --------------
+        - `CompletedProcess` with decoded `stdout` and `stderr`.
+    """
+    proc = await asyncio.create_subprocess_exec(
+        *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+    except BaseException:
+        # Timed out or cancelled by the pool: don't leave the child running
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+        raise
+    result = subprocess.CompletedProcess(
+        cmd, proc.returncode, stdout.decode(errors="replace"), stderr.decode(errors="replace")
+    )
+    if check:
+        result.check_returncode()
+    return result
 
-            with tqdm(total=len(data_source), disable=not progress_bar) as bar:
-                for future in as_completed(futures):
+
+class AsyncPool:
+    """Run coroutine functions concurrently on a single event loop.
+
+    A drop in alternative to `Pool` for work which mostly waits on subprocesses or
+    the network, e.g. helpers built on `run_subprocess`. Plain functions are also
+    accepted and run with `asyncio.to_thread`.
+
+    Attributes:
+        suppress_exceptions (bool): If True, exceptions raised by worker functions will be suppressed.
+        limit (int): Maximum number of tasks running at once.
+        timeout (float | None): Seconds each task may run before failing with `TimeoutError`.
+        report (PoolReport): Successes and failures of the most recent `execute` call.
+    """
+
+    _DONE = object()
+
+    def __init__(
+        self,
+        *,
+        suppress_exceptions: bool = False,
+        limit: int = 64,
+        timeout: float | None = None,
+    ):
+        """Initialize the pool with a concurrency limit and an optional per-task timeout."""
+        if limit < 1:
+            raise ValueError("limit must be a positive integer")
+        self.suppress_exceptions = suppress_exceptions
+        self.limit = limit
+        self.timeout = timeout
+        self.report = PoolReport()
+
+    def execute(
+        self,
+        function: Callable[Concatenate[DataT, P], Awaitable[R] | R],
+        data_source: Iterable[Any],
+        /,
+        progress_bar: bool | ProgressSink = True,
+        *args: P.args,
+        total: int | None = None,
+        **kwargs: P.kwargs,
+    ) -> Generator[R]:
+        """Execute `function` concurrently for each item in the data source.
+
+        Same interface as `Pool.execute`. The event loop runs in the calling thread
+        and is driven one result at a time; from inside a running loop use `aexecute`.
+
+        ### Returns:
+        --------------
+            - `Generator` that yields results in completion order.
+        """
+        results = self.aexecute(
+            function, data_source, progress_bar, *args, total=total, **kwargs
+        )
+
+        async def step() -> R:
+            return await anext(results)
+
+        async def close() -> None:
+            await results.aclose()
+
+        with asyncio.Runner() as runner:
+            try:
+                while True:
                     try:
-                        result = future.result()
-                        yield result
-                    except (StopIteration, KeyboardInterrupt):
+                        yield runner.run(step())
+                    except StopAsyncIteration:
                         break
+            except KeyboardInterrupt:
+                self.report.interrupted = True
+                raise
+            finally:
+                runner.run(close())
+        return self.report
+
+    async def aexecute(
+        self,
+        function: Callable[Concatenate[DataT, P], Awaitable[R] | R],
+        data_source: Iterable[Any],
+        /,
+        progress_bar: bool | ProgressSink = True,
+        *args: P.args,
+        total: int | None = None,
+        **kwargs: P.kwargs,
+    ) -> AsyncGenerator[R]:
+        """Asynchronous counterpart of `execute` for use inside a running event loop.
+
+        ### Parameters:
+        --------------
+            - `function (Callable)`: A coroutine function (or plain function) to call for each item.
+            - `data_source (Iterable)`: The items to process. Consumed lazily, never converted to a list.
+            - `progress_bar (bool | ProgressSink)`: If False, no progress bar will be displayed.
+            - `total (int | None)`: Number of items used for the progress bar.
+            - `*args` | `**kwargs`: Additional arguments to pass to the specified function.
+        """
+        if total is None and isinstance(data_source, Sized):
+            total = len(data_source)
+
+        iterator = iter(data_source)
+        # Bounded so workers stop pulling new items while the consumer is busy
+        queue: asyncio.Queue[Any] = asyncio.Queue(maxsize=self.limit)
+        is_coroutine = inspect.iscoroutinefunction(function)
+
+        async def call(item: Any) -> Any:
+            if is_coroutine:
+                return await function(item, *args, **kwargs)
+            return await asyncio.to_thread(function, item, *args, **kwargs)
+
+        closing = False
+
+        async def worker() -> None:
+            error = None
+            try:
+                # The iterator is shared between workers, which is safe on a single event loop
+                for item in iterator:
+                    start = perf_counter()
+                    try:
+                        value = await asyncio.wait_for(call(item), self.timeout)
                     except Exception as e:
-                        item = futures[future]
-                        details = {
-                            "name": function.__name__,
-                            "args": args,
-                            "kwargs": kwargs,
-                            "item": str(item),
-                        }
-                        e.__setattr__("details", details)
-                        if not self.suppress_exceptions:
-                            print(
-                                f"\n{e!r}",
-                                template.format(e.__class__.__name__, **details),
-                            )
-
-                        exceptions.append(e)
-
-                    bar.update()
-        yield from ()
+                        await queue.put((item, False, e, perf_counter() - start))
+                    else:
+                        await queue.put((item, True, value, perf_counter() - start))
+            except BaseException as e:
+                if closing:
+                    raise
+                # Errors of the data source, or ones which aren't an `Exception`, end the
+                # run like they do in `Pool.execute`, so hand them to the consumer
+                error = e
+            await queue.put((self._DONE, error))
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.limit)]
+        running = len(workers)
+        report = self.report = PoolReport()
+        progress = progress_sink(progress_bar)
+        progress.open(total)
+        started = perf_counter()
+        try:
+            while running:
+                entry = await queue.get()
+                if entry[0] is self._DONE:
+                    running -= 1
+                    if entry[1] is not None:
+                        raise entry[1]
+                    continue
+                item, ok, value, latency = entry
+                progress.update(1, (latency,), queue.qsize())
+                if metrics.enabled:
+                    metrics.observe("pool_task_seconds", latency, function=function_name(function))
+                if ok:
+                    report.succeeded += 1
+                    yield value
+                else:
+                    report_failure(
+                        value,
+                        function,
+                        item,
+                        args,
+                        kwargs,
+                        quiet=self.suppress_exceptions,
+                    )
+                    report.failures.append(Failure(item, value))
+        finally:
+            progress.close()
+            closing = True
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            if metrics.enabled:
+                record_run(function, report, perf_counter() - started)
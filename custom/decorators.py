@@ -1,38 +1,154 @@
-from typing import Any
+from typing import Any, TextIO
 from collections.abc import Callable
+import atexit
 import datetime
-from ExecutionTimer import ExecutionTimer
+import inspect
+import math
+import sys
+import threading
+from ExecutionTimer import format_duration
 import time
 from functools import wraps
 
+# Latencies are bucketed on a log scale, 8 buckets per doubling (~9% resolution)
+_BUCKETS_PER_OCTAVE = 8
 
-def exectimer[**P, R](func: Callable[P, R]) -> Callable[P, R]:
+
+class TimingStats:
+    """Running statistics for the calls of a single function.
+
+    Percentiles are estimated from a log-scale histogram, so memory and the cost
+    of `record` stay constant no matter how many calls are recorded.
+    """
+
+    __slots__ = ("name", "count", "total", "min", "max", "_buckets")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self._buckets: dict[int, int] = {}
+
+    def record(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        bucket = math.floor(math.log2(seconds) * _BUCKETS_PER_OCTAVE) if seconds > 0 else 0
+        self._buckets[bucket] = self._buckets.get(bucket, 0) + 1
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q: float) -> float:
+        """Estimate the `q` quantile (0 to 1) of the recorded durations, in seconds."""
+        target, seen = q * self.count, 0
+        for bucket in sorted(self._buckets):
+            seen += self._buckets[bucket]
+            if seen >= target:
+                # Midpoint of the bucket, clamped to the values actually seen
+                value = 2 ** ((bucket + 0.5) / _BUCKETS_PER_OCTAVE)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+
+class TimingRegistry:
+    """Process-wide collection of `TimingStats`, fed by `exectimer` and `clstimer`.
+
+    A summary table is printed at exit if anything was recorded, unless
+    `dump_at_exit` is set to False. Use `dump()` to print it on demand.
+    """
+
+    def __init__(self) -> None:
+        self.stats: dict[str, TimingStats] = {}
+        self.dump_at_exit = True
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float) -> None:
+        with self._lock:
+            stats = self.stats.get(name)
+            if stats is None:
+                stats = self.stats[name] = TimingStats(name)
+            stats.record(seconds)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.stats.clear()
+
+    def summary(self, sort_by: str = "total") -> str:
+        """Format the recorded statistics as a table sorted by `sort_by` (descending).
+
+        Args:
+            sort_by (str): One of `total`, `count`, `mean`, `max` or `min`.
+        """
+        with self._lock:
+            rows = sorted(self.stats.values(), key=lambda s: getattr(s, sort_by), reverse=True)
+        header = ("function", "calls", "total", "mean", "min", "p50", "p95", "p99", "max")
+        lines = ["{:<40} {:>8} {:>14} {:>14} {:>14} {:>14} {:>14} {:>14} {:>14}".format(*header)]
+        for s in rows:
+            durations = (s.total, s.mean, s.min, *map(s.percentile, (0.5, 0.95, 0.99)), s.max)
+            lines.append(
+                f"{s.name:<40} {s.count:>8} "
+                + " ".join(f"{format_duration(d):>14}" for d in durations)
+            )
+        return "\n".join(lines)
+
+    def dump(self, file: TextIO | None = None, sort_by: str = "total") -> None:
+        """Print the summary table to `file` (stderr by default)."""
+        if self.stats:
+            print(self.summary(sort_by), file=file or sys.stderr)
+
+
+registry = TimingRegistry()
+
+
+@atexit.register
+def _dump_registry() -> None:
+    if registry.dump_at_exit:
+        registry.dump()
+
+
+def exectimer[**P, R](
+    func: Callable[P, R] | None = None, /, *, echo: bool = False, stream_stats: bool = False
+) -> Callable[P, R] | Callable[[Callable[P, R]], Callable[P, R]]:
     """Decorator wrapper which measures the execution time of `func`.
 
+    Every call is recorded in the process-wide `registry`, which prints a summary
+    table at exit instead of a line per call. Can be used bare (`@exectimer`) or
+    with options (`@exectimer(echo=True)`).
+
+    Coroutine functions are timed until the coroutine finishes, and generators and
+    async generators from the first item requested until they are exhausted or
+    closed, rather than just the creation of the coroutine or generator object.
+
     Args:
         func (Callable): The function whose execution time will be measured.
+        echo (bool): If True, also print the execution time of every call.
+        stream_stats (bool): For generators, also record the time to the first item
+            (`<name> [first item]`), the time spent producing items inside the
+            generator (`<name> [producer]`) and the time spent by the consumer between
+            items (`<name> [consumer]`).
 
     Returns:
-        Callable: A wrapper function that measures and prints the execution
+        Callable: A wrapper function that measures and records the execution
                   time of the original function.
     """  # noqa: D401
+    if func is None:
+        return lambda f: exectimer(f, echo=echo, stream_stats=stream_stats)
 
-    @wraps(func)
-    def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
-        with ExecutionTimer(print_on_exit=False) as timer:
-            result = func(*args, **kwargs)
-        msg = f"\n{func.__name__} took {timer.execution_time:.6f} seconds to execute."
-        print(msg)
-        return result
-
-    return wrapper
+    return _timer_wrapper(func, echo=echo, stream_stats=stream_stats)
 
 
-def clstimer(cls: type) -> type:
+def clstimer(cls: type | None = None, /, *, stream_stats: bool = False) -> type | Callable:
     """Class decorator to measure the execution time of all methods in the class.
 
-    The execution time is printed for each method.
-    Note that this decorator will not work if used with abstract base classes (ABC).
+    The execution time of each method is recorded in the process-wide `registry`.
+    Coroutine and generator methods are handled like `exectimer` does, including
+    `stream_stats`. Note that this decorator will not work if used with abstract
+    base classes (ABC).
 
     Usage:
         @timer
@@ -43,35 +159,122 @@ def clstimer(cls: type) -> type:
             def say_hello(self):
                 print(f"Hello {self.name}!")
 
-    This will measure and print the execution time of both __init__ and say_hello methods.
+    This will measure the execution time of both __init__ and say_hello methods.
     """
+    if cls is None:
+        return lambda c: clstimer(c, stream_stats=stream_stats)
 
     # Wrap each method in a timer function
     for attr_name, attr_value in cls.__dict__.items():
         if callable(attr_value):
-            setattr(cls, attr_name, _timer_wrapper(attr_value))
+            setattr(cls, attr_name, _timer_wrapper(attr_value, stream_stats=stream_stats))
 
     return cls
 
 
-def _timer_wrapper(func):
+def _timer_wrapper(func, *, echo=False, stream_stats=False):
     """Timer wrapper that measures the execution time of a function.
 
     Args:
-        func (callable): The function to be timed.
+        func (callable): The function to be timed. Coroutine functions, generator
+            functions and async generator functions get a wrapper of the same kind.
+        echo (bool): If True, also print the execution time of every call.
+        stream_stats (bool): See `exectimer`.
 
     Returns:
         wrapped_func: The decorated function.
     """
+    name = getattr(func, "__qualname__", repr(func))
+
+    def record(elapsed, first=None, producer=None):
+        registry.record(name, elapsed)
+        if stream_stats and producer is not None:
+            if first is not None:
+                registry.record(f"{name} [first item]", first)
+            registry.record(f"{name} [producer]", producer)
+            registry.record(f"{name} [consumer]", max(0.0, elapsed - producer))
+        if echo:
+            print(f"\n{name} took {elapsed:.6f} seconds to execute.")
+
+    if inspect.isasyncgenfunction(func):
+
+        @wraps(func)
+        async def wrapped_func(*args, **kwargs):
+            agen = func(*args, **kwargs)
+            send, value = agen.asend, None
+            start = time.perf_counter()
+            first, producer = None, 0.0
+            try:
+                while True:
+                    resumed = time.perf_counter()
+                    try:
+                        item = await send(value)
+                    except StopAsyncIteration:
+                        return
+                    finally:
+                        producer += time.perf_counter() - resumed
+                    if first is None:
+                        first = time.perf_counter() - start
+                    try:
+                        value = yield item
+                        send = agen.asend
+                    except GeneratorExit:
+                        await agen.aclose()
+                        raise
+                    except BaseException as e:
+                        send, value = agen.athrow, e
+            finally:
+                record(time.perf_counter() - start, first, producer)
+
+    elif inspect.isgeneratorfunction(func):
+
+        @wraps(func)
+        def wrapped_func(*args, **kwargs):
+            gen = func(*args, **kwargs)
+            send, value = gen.send, None
+            start = time.perf_counter()
+            first, producer = None, 0.0
+            try:
+                while True:
+                    resumed = time.perf_counter()
+                    try:
+                        item = send(value)
+                    except StopIteration as e:
+                        # Keep the generator's return value, e.g. the report of `Pool.execute`
+                        return e.value
+                    finally:
+                        producer += time.perf_counter() - resumed
+                    if first is None:
+                        first = time.perf_counter() - start
+                    try:
+                        value = yield item
+                        send = gen.send
+                    except GeneratorExit:
+                        gen.close()
+                        raise
+                    except BaseException as e:
+                        send, value = gen.throw, e
+            finally:
+                record(time.perf_counter() - start, first, producer)
+
+    elif inspect.iscoroutinefunction(func):
 
-    def wrapped_func(*args, **kwargs):
-        start_time = time.perf_counter()
-        result = func(*args, **kwargs)
-        end_time = time.perf_counter()
+        @wraps(func)
+        async def wrapped_func(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                record(time.perf_counter() - start)
 
-        # Print the execution time
-        print(f"{func.__name__} executed in {end_time - start_time:.6f}s")
+    else:
 
-        return result
+        @wraps(func)
+        def wrapped_func(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(time.perf_counter() - start)
 
     return wrapped_func
@@ -0,0 +1,284 @@
+"""instrumentation.py - Spans, counters and histograms shared by the tools in this repo.
+
+Probes are disabled by default and return after a single attribute check, so hot paths
+guard them with `if metrics.enabled:` and pay nothing else. Once enabled, metrics are
+exported to a JSON-lines file, a Prometheus text file (for node_exporter's textfile
+collector) or both:
+
+>>> from instrumentation import metrics
+    metrics.enable(jsonl="metrics.jsonl", prometheus="/var/lib/node_exporter/tools.prom")
+    with metrics.span("index", path=path):
+        ...
+    metrics.count("files_removed_total", len(removed))
+
+Scripts can also be instrumented without code changes by setting the `INSTRUMENTATION_JSONL`
+and/or `INSTRUMENTATION_PROM` environment variables to the output paths.
+"""
+
+import atexit
+import json
+import os
+import threading
+from bisect import bisect_left
+from time import perf_counter_ns, time
+from typing import Any, TextIO
+
+# Upper bounds in seconds, fine enough for both per-task latencies and whole runs
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 60.0, 300.0, 1800.0)
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def _labels(labels: dict[str, Any]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels: Labels, **extra: str) -> str:
+    pairs = [*labels, *extra.items()]
+    if not pairs:
+        return ""
+    escaped = (
+        (key, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for key, value in pairs
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+class _Histogram:
+    """Cumulative bucket counts in the layout Prometheus expects."""
+
+    __slots__ = ("buckets", "count", "counts", "sum")
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        total, result = 0, []
+        for bound, count in zip((*map(str, self.buckets), "+Inf"), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+class _NullSpan:
+    """Returned by `Metrics.span` while disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """Time a block and record it as `<name>_seconds` plus a `span` event."""
+
+    __slots__ = ("duration", "labels", "metrics", "name", "start_ns")
+
+    def __init__(self, metrics: "Metrics", name: str, labels: dict[str, Any]) -> None:
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+        self.duration = 0.0
+
+    def __enter__(self):
+        self.start_ns = perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.duration = (perf_counter_ns() - self.start_ns) / 1e9
+        status = "ok" if exc_type is None else "error"
+        self.metrics.observe(f"{self.name}_seconds", self.duration, **self.labels)
+        self.metrics.event(
+            "span", name=self.name, duration=self.duration, status=status, labels=self.labels
+        )
+
+
+class Metrics:
+    """Registry of counters, gauges and histograms with JSON-lines and Prometheus export.
+
+    Attributes:
+        enabled (bool): If False, every probe is a no-op.
+        jsonl (str | None): Path of the JSON-lines file. Spans and events are appended as
+            they happen, counters, gauges and histograms on every `flush`.
+        prometheus (str | None): Path of the Prometheus text file, rewritten atomically
+            on every `flush`.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.jsonl: str | None = None
+        self.prometheus: str | None = None
+        self.counters: dict[tuple[str, Labels], float] = {}
+        self.gauges: dict[tuple[str, Labels], float] = {}
+        self.histograms: dict[tuple[str, Labels], _Histogram] = {}
+        self._file: TextIO | None = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def enable(
+        self,
+        jsonl: str | None = None,
+        prometheus: str | None = None,
+        interval: float | None = None,
+    ) -> None:
+        """Start recording and exporting metrics.
+
+        ### Parameters:
+        -----------------
+            - `jsonl (str | None)`: JSON-lines file to append to.
+            - `prometheus (str | None)`: Prometheus text file to write.
+            - `interval (float | None)`: If set, also flush every `interval` seconds so
+                long running tools can be charted while they run.
+        """
+        self.jsonl = jsonl
+        self.prometheus = prometheus
+        if jsonl:
+            self._file = open(jsonl, "a", buffering=1 << 16)  # noqa: SIM115
+        self.enabled = True
+        if interval is not None:
+            self._stop.clear()
+            threading.Thread(
+                target=self._flush_every, args=(interval,), name="Metrics", daemon=True
+            ).start()
+
+    def disable(self) -> None:
+        """Flush pending metrics, close the JSON-lines file and stop recording."""
+        if not self.enabled:
+            return
+        self.flush()
+        self.enabled = False
+        self._stop.set()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def span(self, name: str, **labels: Any) -> _Span | _NullSpan:
+        """Return a context manager timing its block as `<name>_seconds`."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, labels)
+
+    def count(self, name: str, value: float = 1, **labels: Any) -> None:
+        """Increment a counter. By Prometheus convention `name` ends with `_total`."""
+        if not self.enabled:
+            return
+        key = (name, _labels(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def gauge(self, name: str, value: float, **labels: Any) -> None:
+        """Set a gauge to its current value."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.gauges[(name, _labels(labels))] = value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        """Add a value, usually a duration in seconds, to a histogram."""
+        if not self.enabled:
+            return
+        key = (name, _labels(labels))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = _Histogram()
+            histogram.observe(value)
+
+    def event(self, kind: str, **fields: Any) -> None:
+        """Append a single record to the JSON-lines file."""
+        if not self.enabled or self._file is None:
+            return
+        line = json.dumps({"ts": time(), "type": kind, **fields}, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def flush(self) -> None:
+        """Export the current value of every metric."""
+        if not self.enabled:
+            return
+        with self._lock:
+            counters = dict(self.counters)
+            gauges = dict(self.gauges)
+            histograms = {
+                key: (h.cumulative(), h.sum, h.count) for key, h in self.histograms.items()
+            }
+        if self._file is not None:
+            self._write_jsonl(counters, gauges, histograms)
+        if self.prometheus:
+            self._write_prometheus(counters, gauges, histograms)
+
+    def _write_jsonl(self, counters: dict, gauges: dict, histograms: dict) -> None:
+        now = time()
+        lines = []
+        for kind, values in (("counter", counters), ("gauge", gauges)):
+            for (name, labels), value in values.items():
+                record = {"ts": now, "type": kind, "name": name, "value": value}
+                lines.append(json.dumps(record | {"labels": dict(labels)}))
+        for (name, labels), (buckets, total, count) in histograms.items():
+            record = {
+                "ts": now,
+                "type": "histogram",
+                "name": name,
+                "sum": total,
+                "count": count,
+                "buckets": dict(buckets),
+                "labels": dict(labels),
+            }
+            lines.append(json.dumps(record))
+        with self._lock:
+            if self._file is not None:
+                self._file.write("".join(line + "\n" for line in lines))
+                self._file.flush()
+
+    def _write_prometheus(self, counters: dict, gauges: dict, histograms: dict) -> None:
+        lines = []
+        for kind, values in (("counter", counters), ("gauge", gauges)):
+            typed = set()
+            for (name, labels), value in sorted(values.items()):
+                if name not in typed:
+                    typed.add(name)
+                    lines.append(f"# TYPE {name} {kind}")
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+        typed = set()
+        for (name, labels), (buckets, total, count) in sorted(histograms.items()):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} histogram")
+            for bound, cumulative in buckets:
+                lines.append(f"{name}_bucket{_format_labels(labels, le=bound)} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+
+        # node_exporter may read the file at any time, so never expose a partial write
+        tmp = f"{self.prometheus}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp, self.prometheus)
+
+    def _flush_every(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            self.flush()
+
+
+metrics = Metrics()
+atexit.register(metrics.disable)
+
+if os.environ.get("INSTRUMENTATION_JSONL") or os.environ.get("INSTRUMENTATION_PROM"):
+    metrics.enable(
+        jsonl=os.environ.get("INSTRUMENTATION_JSONL"),
+        prometheus=os.environ.get("INSTRUMENTATION_PROM"),
+    )
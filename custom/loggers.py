@@ -1,5 +1,13 @@
+import atexit
+import copy
+import json
 import logging
+import os
+import queue
+import sys
+import time
 from logging import Logger
+from logging.handlers import QueueHandler, QueueListener
 
 RESET_SEQ = "\033[0m"
 COLOR_SEQ = "\033[1;%dm"
@@ -14,17 +22,189 @@ COLORS = {
 }
 
 
+_LEVEL_SEQ = {
+    level: color if isinstance(color, str) else COLOR_SEQ % (30 + color)
+    for level, color in COLORS.items()
+}
+
+# Attributes every LogRecord has. Anything else was passed with `extra=`
+_RECORD_ATTRIBUTES = frozenset(logging.makeLogRecord({}).__dict__) | {"message", "asctime"}
+
+
 class ColoredFormatter(logging.Formatter):
-    def format(self, record):
+    def formatMessage(self, record):
+        # Color the level name only while formatting, so other handlers see the plain record
         levelname = record.levelname
-        color = COLOR_SEQ % (30 + COLORS.get(levelname, 0))
+        color = _LEVEL_SEQ.get(levelname, COLOR_SEQ % 30)
         record.levelname = f"{color}[{levelname}]{RESET_SEQ}"
-        return super().format(record)
+        try:
+            return super().formatMessage(record)
+        finally:
+            record.levelname = levelname
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as compact JSON objects, one per line, for machine consumption.
+
+    Every line has `ts` (Unix time), `level`, `logger`, `func`, `file`, `line` and `msg`.
+    Fields passed with `extra`, e.g. the path being processed, a duration or a byte
+    count, are included as they are:
+
+    >>> logger.info("Removed", extra={"path": path, "bytes": size, "duration": elapsed})
+    {"ts":1718000000.12,"level":"INFO",...,"msg":"Removed","path":"/a.jpg","bytes":4096,...}
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._encoder = json.JSONEncoder(
+            separators=(",", ":"), ensure_ascii=False, default=str
+        ).encode
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "func": record.funcName,
+            "file": record.pathname,
+            "line": record.lineno,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                data[key] = value
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data["exc"] = record.exc_text
+        return self._encoder(data)
+
+
+class BatchingStreamHandler(logging.StreamHandler):
+    """A `StreamHandler` which collects formatted records and writes them in batches.
+
+    The buffer is written when it holds `capacity` records, when a record of level
+    `flush_level` or above arrives, and whenever `flush` is called. Flushing also
+    writes the records still held back by a `RateLimitFilter` of the handler.
+    """
+
+    def __init__(self, stream=None, capacity: int = 64, flush_level: int = logging.ERROR):
+        super().__init__(stream)
+        self.capacity = capacity
+        self.flush_level = flush_level
+        self.pending: list[str] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self.pending.append(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+            return
+        if len(self.pending) >= self.capacity or record.levelno >= self.flush_level:
+            self.flush()
+
+    def flush(self) -> None:
+        with self.lock:
+            for f in self.filters:
+                if isinstance(f, RateLimitFilter):
+                    self.pending.extend(self.format(r) + self.terminator for r in f.drain())
+            if self.pending and self.stream is not None:
+                self.stream.write("".join(self.pending))
+                self.pending.clear()
+            super().flush()
+
+    def close(self) -> None:
+        self.flush()
+        super().close()
+
+
+class RateLimitFilter(logging.Filter):
+    """Drop repeated messages, and optionally cap how many records a call site emits.
+
+    Per call site (file and line), a message identical to the previous one within
+    `window` seconds is dropped. With `max_per_window`, any message past that many in
+    the current window is dropped too. The number of dropped records is appended to a
+    copy of the next record let through, so other handlers of the same record still
+    see the original message. Counts still pending when a loop ends are returned by
+    `drain`, which `BatchingStreamHandler` calls on every flush.
+    """
+
+    def __init__(self, window: float = 1.0, max_per_window: int | None = None) -> None:
+        super().__init__()
+        self.window = window
+        self.max_per_window = max_per_window
+        # (pathname, lineno) -> [window start, records in window, dropped, last message,
+        #                        last dropped record]
+        self.sites: dict[tuple[str, int], list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool | logging.LogRecord:
+        now = time.monotonic()
+        message = record.getMessage()
+        site = self.sites.get((record.pathname, record.lineno))
+        if site is None:
+            self.sites[(record.pathname, record.lineno)] = [now, 1, 0, message, None]
+            return True
+        if now - site[0] >= self.window:
+            site[0], site[1] = now, 0
+        elif message == site[3] or (
+            self.max_per_window is not None and site[1] >= self.max_per_window
+        ):
+            site[2] += 1
+            site[4] = record
+            return False
+        site[1] += 1
+        site[3] = message
+        if site[2]:
+            record = _suppressed(record, site[2])
+            site[2], site[4] = 0, None
+            return record
+        return True
+
+    def drain(self) -> list[logging.LogRecord]:
+        """Return the last dropped record of every call site with pending drops.
+
+        The record is counted as shown, so it carries the number of the others.
+        """
+        records = []
+        for site in self.sites.values():
+            if site[2]:
+                records.append(_suppressed(site[4], site[2] - 1))
+                site[2], site[4] = 0, None
+        return records
+
+
+def _suppressed(record: logging.LogRecord, count: int) -> logging.LogRecord:
+    """Copy `record` with `count` dropped records appended to its message."""
+    if not count:
+        return record
+    record = copy.copy(record)
+    record.msg, record.args = f"{record.getMessage()} ({count} similar suppressed)", None
+    return record
+
+
+class _FlushingQueueListener(QueueListener):
+    """A `QueueListener` which flushes its handlers whenever the queue has been idle
+    for `interval` seconds, so batched records are not held back indefinitely."""
+
+    def __init__(self, queue, *handlers, interval: float = 0.1) -> None:
+        super().__init__(queue, *handlers, respect_handler_level=True)
+        self.interval = interval
+
+    def dequeue(self, block: bool) -> logging.LogRecord:
+        while True:
+            try:
+                return self.queue.get(block, self.interval)
+            except queue.Empty:
+                if not block:
+                    raise
+                for handler in self.handlers:
+                    handler.flush()
 
 
 class ColoredLogger(logging.Logger):
     def __init__(self, name):
         super().__init__(name, logging.DEBUG)
+        self.listener: QueueListener | None = None
         color_handler = logging.StreamHandler()
         color_handler.setFormatter(
             ColoredFormatter(
@@ -34,6 +214,94 @@ class ColoredLogger(logging.Logger):
         )
         self.addHandler(color_handler)
 
+    def enable_queue(
+        self,
+        *,
+        batch_size: int = 64,
+        flush_interval: float = 0.1,
+        rate_limit: bool = True,
+        window: float = 1.0,
+        max_per_window: int | None = None,
+    ) -> QueueListener:
+        """Log through a `QueueHandler` so calling threads never wait on terminal I/O.
+
+        Records are put on a queue and written by a background `QueueListener` thread,
+        in batches of up to `batch_size` records or after `flush_interval` idle seconds.
+        Unless `rate_limit` is False, repeated terminal messages are dropped by a
+        `RateLimitFilter`. The listener is stopped, and everything pending written, at exit.
+
+        Useful when logging from `Pool` workers:
+
+        >>> logger.enable_queue()
+            for result in Pool().execute(process_item, items):
+                ...
+
+        ### Parameters:
+        -----------------
+            - `batch_size (int)`: Records written to the terminal at once.
+            - `flush_interval (float)`: Seconds the queue may be idle before a partial
+                batch is written.
+            - `rate_limit (bool)`: Set to False where every line matters, e.g. when the
+                terminal output is the record of which files were changed.
+            - `window (float)` | `max_per_window (int | None)`: See `RateLimitFilter`.
+        """
+        if self.listener is not None:
+            return self.listener
+
+        handlers = []
+        for handler in self.handlers:
+            if type(handler) is logging.StreamHandler:
+                # Swap plain stream handlers for a batching one writing to the same stream
+                batching = BatchingStreamHandler(handler.stream, batch_size)
+                batching.setFormatter(handler.formatter)
+                batching.setLevel(handler.level)
+                if rate_limit:
+                    # Only the terminal is rate limited, structured sinks get every record
+                    batching.addFilter(RateLimitFilter(window, max_per_window))
+                handler = batching
+            handlers.append(handler)
+
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._direct_handlers = self.handlers
+        self.handlers = [QueueHandler(log_queue)]
+        self.listener = _FlushingQueueListener(log_queue, *handlers, interval=flush_interval)
+        self.listener.start()
+        atexit.register(self.disable_queue)
+        return self.listener
+
+    def add_json_handler(
+        self, path: str | None = None, *, batch_size: int = 256
+    ) -> BatchingStreamHandler:
+        """Also write every record as a JSON line (see `JsonFormatter`), e.g. for cron jobs.
+
+        Lines are written in batches of `batch_size` and at exit. Add the handler before
+        calling `enable_queue` to have it run on the listener thread too.
+
+        ### Parameters:
+        -----------------
+            - `path (str | None)`: File to append to. Defaults to stdout.
+            - `batch_size (int)`: Records written at once.
+        """
+        stream = open(path, "a", encoding="utf-8") if path else sys.stdout  # noqa: SIM115
+        handler = BatchingStreamHandler(stream, batch_size)
+        handler.setFormatter(JsonFormatter())
+        self.addHandler(handler)
+        return handler
+
+    def disable_queue(self) -> None:
+        """Write any queued records and go back to logging from the calling thread."""
+        if self.listener is None:
+            return
+        listener, self.listener = self.listener, None
+        listener.stop()
+        for handler in listener.handlers:
+            handler.flush()
+        self.handlers = self._direct_handlers
+
 
 logging.setLoggerClass(ColoredLogger)
 logger: Logger = logging.getLogger(__name__)
+
+# Scripts run from cron can log structured output without code changes
+if os.environ.get("LOG_JSONL"):
+    logger.add_json_handler(os.environ["LOG_JSONL"])
@@ -1,8 +1,14 @@
 #!/usr/bin/env python3
 """Convert bytes to a human-readble string."""
 
+import os
+import re
 import sys
+from bisect import bisect_right
+from collections.abc import Iterable, Sequence
 from enum import Enum
+from functools import cache
+from typing import Literal, Self
 
 
 class SizeUnit(Enum):
@@ -15,42 +21,172 @@ class SizeUnit(Enum):
     TB = 1024**4
 
 
+UnitSystem = Literal["binary", "iec", "si"]
+
+# Unit names and sizes of each system. "binary" is the historic output of this module:
+# powers of 1024 labelled with SI prefixes, like `du -h` and `ls -h` print them.
+_SYSTEMS: dict[str, tuple[tuple[str, int], ...]] = {
+    "binary": tuple((unit.name, unit.value) for unit in SizeUnit),
+    "iec": tuple(
+        (name, 1024**i) for i, name in enumerate(("B", "KiB", "MiB", "GiB", "TiB"))
+    ),
+    "si": tuple((name, 1000**i) for i, name in enumerate(("B", "kB", "MB", "GB", "TB"))),
+}
+
+# Exclusive upper bound of every unit but the largest, searched with `bisect`
+_BOUNDS = {
+    system: tuple(units[i + 1][1] for i in range(len(units) - 1))
+    for system, units in _SYSTEMS.items()
+}
+
+_PARSE_PATTERN = re.compile(r"\s*\+?([\d.,_]+)\s*([a-zA-Z]*)\s*")
+_PREFIXES = "kmgt"
+
+
+def _scale(size_in_bytes: int, units: UnitSystem = "binary") -> tuple[float, str]:
+    """Return `size_in_bytes` in the largest unit which keeps it readable, and the unit.
+
+    The unit is picked from the magnitude and the value keeps the sign.
+    """
+    name, divisor = _SYSTEMS[units][bisect_right(_BOUNDS[units], abs(size_in_bytes))]
+    return size_in_bytes / divisor, name
+
+
+def format_sizes(sizes: Iterable[int], units: UnitSystem = "binary") -> list[str]:
+    """Format many byte counts at once, e.g. a column of a file listing.
+
+    The unit of every size is looked up in one vectorized pass when numpy is available,
+    and no `Size` object is created per item.
+
+    Parameters
+    ----------
+        `sizes` (Iterable[int] | numpy.ndarray): Sizes in bytes.
+        `units` (str): Unit system, see `Size`.
+
+    Returns
+    -------
+        list[str]: The same strings `str(Size(size, units))` would return, in order.
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        scaled = (_scale(int(size), units) for size in sizes)
+        return [f"{value:.2f} {name}" for value, name in scaled]
+
+    if isinstance(sizes, np.ndarray | Sequence):
+        array = np.asarray(sizes, dtype=np.float64)
+    else:
+        array = np.fromiter(sizes, dtype=np.float64)
+    bounds, divisors = _thresholds(units)
+    index = np.searchsorted(bounds, np.abs(array), side="right")
+    values = (array / divisors[index]).tolist()
+    names = [name for name, _ in _SYSTEMS[units]]
+    return [f"{value:.2f} {names[i]}" for value, i in zip(values, index.tolist())]
+
+
+@cache
+def _thresholds(units: UnitSystem):
+    """Unit bounds and divisors of `units` as numpy arrays, built on first use."""
+    import numpy as np
+
+    return (
+        np.array(_BOUNDS[units], dtype=np.float64),
+        np.array([divisor for _, divisor in _SYSTEMS[units]], dtype=np.float64),
+    )
+
+
 class Size(int):
-    """Convert a size in bytes to a human-readable string representation."""
+    """Convert a size in bytes to a human-readable string representation.
 
-    def __init__(self, size_in_bytes: int):
-        """Initialize ByteConverter object with a size in bytes.
+    The unit and the value in that unit are computed once, in `__init__`, and are
+    available as `unit` and `value`. Use `format_sizes` to format many sizes at once.
 
-        Parameters
-        ----------
-            `size_in_bytes` (int): Size in bytes."""
+    Adding, subtracting or multiplying by an integer returns a `Size`, so totals can be
+    accumulated directly, e.g. with `sum(sizes)`. Negative sizes, such as the difference
+    of two sizes, keep their sign: `str(Size(1536) - Size(2048))` is `-512.00 B`.
 
-        self.size_in_bytes = abs(int(size_in_bytes))
+    Unit systems
+    ------------
+        - `binary`: Powers of 1024 labelled KB, MB, ... (default, like `du -h`).
+        - `iec`: Powers of 1024 labelled KiB, MiB, ...
+        - `si`: Powers of 1000 labelled kB, MB, ...
+    """
 
-    def _convert(self) -> str:
-        """Convert bytes to the appropriate unit (B, KB, MB, GB, or TB)."""
-        size = self.size_in_bytes
-        for unit in SizeUnit:
-            if size < SizeUnit.KB.value:
-                return f"{size:.2f} {unit.name}"
-            size /= 1024
+    def __new__(cls, size_in_bytes: int, units: UnitSystem = "binary"):
+        return super().__new__(cls, size_in_bytes)
 
-        return f"{size / 1024:.2f} {SizeUnit.TB.name}"  # Last unit is TB
+    def __init__(self, size_in_bytes: int, units: UnitSystem = "binary"):
+        """Initialize ByteConverter object with a size in bytes.
+
+        Parameters
+        ----------
+            `size_in_bytes` (int): Size in bytes.
+            `units` (str): Unit system used to format the size."""
+        if units not in _SYSTEMS:
+            raise ValueError(f"Unknown unit system {units!r}, expected one of {list(_SYSTEMS)}")
+        self.units = units
+        self.size_in_bytes = int(size_in_bytes)
+        self.value, self.unit = _scale(self.size_in_bytes, units)
+
+    @classmethod
+    def parse(cls, text: str, units: UnitSystem = "binary") -> "Size":
+        """Parse a human-readable size such as `1.5 GiB`, `300kB`, `2G` or `1,024`.
+
+        IEC suffixes (KiB, MiB, ...) are always powers of 1024. Other suffixes (K, KB,
+        M, MB, ...) are powers of 1000 with `units="si"` and of 1024 otherwise, which
+        matches the output of `du -h` and of this class. The result uses `units`.
+
+        Raises
+        ------
+            ValueError: If `text` is not a size, including negative sizes.
+        """
+        match = _PARSE_PATTERN.fullmatch(text)
+        if match is None:
+            raise ValueError(f"Invalid size: {text!r}")
+        suffix = match.group(2).lower().removesuffix("b")
+        if suffix in ("", *_PREFIXES):
+            base = 1000 if units == "si" else 1024
+        elif len(suffix) == 2 and suffix[0] in _PREFIXES and suffix[1] == "i":
+            base = 1024
+        else:
+            raise ValueError(f"Invalid size: {text!r}")
+        try:
+            number = float(match.group(1).replace(",", "").replace("_", ""))
+        except ValueError:
+            raise ValueError(f"Invalid size: {text!r}") from None
+        exponent = _PREFIXES.index(suffix[0]) + 1 if suffix else 0
+        return cls(round(number * base**exponent), units)
+
+    def _sized(self, result: int) -> "Size":
+        return result if result is NotImplemented else Size(result, self.units)
+
+    def __add__(self, other: int) -> "Size":
+        return self._sized(int.__add__(self, other))
+
+    __radd__ = __add__
+
+    def __sub__(self, other: int) -> "Size":
+        return self._sized(int.__sub__(self, other))
+
+    def __rsub__(self, other: int) -> "Size":
+        return self._sized(int.__rsub__(self, other))
+
+    def __mul__(self, other: int) -> "Size":
+        return self._sized(int.__mul__(self, other))
+
+    __rmul__ = __mul__
 
     def __str__(self):
-        return self._convert()
+        return f"{self.value:.2f} {self.unit}"
 
     def __float__(self) -> float:
-        return float(self._convert().split()[0])
+        return self.value
 
     def __int__(self) -> int:
         return int(self.size_in_bytes)
 
     def __repr__(self) -> str:
-        return (
-            f"{self.__class__.__name__}"
-            + f"(raw={self.size_in_bytes}, human={self._convert()})"
-        )
+        return f"{self.__class__.__name__}(raw={self.size_in_bytes}, human={self!s})"
 
     def __format__(self, format_spec: str, /) -> str:
         match format_spec:
@@ -66,11 +202,47 @@ class Size(int):
                 return str(self)
 
 
+class SizeTotal:
+    """Running total of sizes, fed one item at a time so nothing is collected in a list.
+
+    Items are byte counts or anything with an `st_size` attribute, such as the
+    results of `os.stat`.
+
+    Example
+    -------
+        >>> total = SizeTotal().update(os.stat(path) for path in paths)
+            print(f"{total.count} files, {total}")
+    """
+
+    def __init__(self, units: UnitSystem = "binary") -> None:
+        self.units = units
+        self.bytes = 0
+        self.count = 0
+
+    def add(self, item: "int | os.stat_result") -> None:
+        """Add a single size."""
+        self.bytes += item if isinstance(item, int) else item.st_size
+        self.count += 1
+
+    def update(self, items: "Iterable[int | os.stat_result]") -> Self:
+        """Add every size from `items` and return the total, so calls can be chained."""
+        for item in items:
+            self.add(item)
+        return self
+
+    @property
+    def size(self) -> Size:
+        return Size(self.bytes, self.units)
+
+    def __str__(self) -> str:
+        return str(self.size)
+
+
 if __name__ == "__main__":
     try:
         # isatty() returns True if file descriptor is a TTY
         arg = sys.stdin.read() if not sys.stdin.isatty() else sys.argv[1]
-        print(Size(int(arg)))
+        print(Size.parse(arg))
     except (IndexError, ValueError):
         print("Usage: ./size  <size in bytes>")
         sys.exit(1)
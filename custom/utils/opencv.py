@@ -6,7 +6,7 @@ import cython
 import numpy as np
 import pytesseract
 from Color import cprint, fg, style
-from FrameBuffer import FrameBuffer
+from FrameBuffer import FrameBuffer, RingFrameBuffer
 import moviepy
 from numpy import ndarray
 from collections import namedtuple
@@ -135,14 +135,15 @@ def save_keyframe(
 
 
 def create_frame_index(
-    vid_path: str, output_path: str, buffer: FrameBuffer, keywords: list[str]
+    vid_path: str, output_path: str, buffer: FrameBuffer | RingFrameBuffer, keywords: list[str]
 ) -> list[str]:
     """Return a list of frames indices that contain <keywords>.
 
     Parameters
     -----------
         - `interval` (int): How often to check for <keywords> in the video (in frames)
-        - `buffer` (int): An instance of a FrameBuffer to cache a limited number of frames
+        - `buffer` (int): An instance of a FrameBuffer to cache a limited number of frames.
+            A `RingFrameBuffer` has frames decoded straight into its preallocated slots.
         - `keywords` (list): A list of keywords to to look for in the killfeed.
 
     Returns
@@ -167,7 +168,8 @@ def create_frame_index(
     frame_index = []
 
     while cap.isOpened():
-        ret, frame = cap.read()
+        slot = buffer.next_slot()
+        ret, frame = cap.read() if slot is None else cap.read(slot)
         if not ret:
             break
 
@@ -178,20 +180,12 @@ def create_frame_index(
             if kill_detected is True:
                 msg = log_template.format(fg.green, "DETECT", style.reset, "Kill found @", count)
                 print(f"{msg:60}", end=" ")
-                # Write the past <INTERVAL> frames to the output video
-                for _buffered_frame, index in buffer.get_frames():
-                    # This is a check to ensure that we don't write duplicate frames
-                    if index not in frame_index:
-                        msg = log_template.format(
-                            fg.cyan, "WRITE", style.reset, "Wrote frame", index
-                        )
-                        cprint(f"{msg:60}", end="\r")
-                        frame_index.append(index)
-                    else:
-                        msg = log_template.format(
-                            fg.yellow, "SKIPPED", style.reset, "Duplicate frame", index
-                        )
-                        print(msg, end="\r")
+                # Write the past <INTERVAL> frames to the output video. Frames already
+                # written for an overlapping kill are skipped by the buffer's high-water mark
+                for _buffered_frame, index in buffer.drain_unexported():
+                    msg = log_template.format(fg.cyan, "WRITE", style.reset, "Wrote frame", index)
+                    cprint(f"{msg:60}", end="\r")
+                    frame_index.append(index)
             else:  # Debug logging
                 msg = log_template.format(fg.orange, "SKIPPED", style.reset, "No kill", count)
                 log.append("\t".join([msg, name]))
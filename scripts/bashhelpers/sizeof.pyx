@@ -6,7 +6,7 @@ import subprocess
 
 cimport cython
 from ExecutionTimer import ExecutionTimer
-from size import Size
+from size import format_sizes
 
 SIZE_FORMAT = 12
 
@@ -26,6 +26,7 @@ cpdef void main(str path, unsigned short int lines, bint include_files, bint one
     """
     # Build the command to be executed based on the given arguments.
     cdef str cmd, output, size, directory
+    cdef list sizes = [], directories = []
     cmd = "du -b" if not include_files else "du -ab"
     if one_filesystem:
         cmd += "x"
@@ -34,7 +35,11 @@ cpdef void main(str path, unsigned short int lines, bint include_files, bint one
     for item in output.split("\n"):
         if not 'Permission denied' in item:
             size, directory = item.split("\t")
-            print(f"{str(Size(int(size))).ljust(12)}{directory}")
+            sizes.append(int(size))
+            directories.append(directory)
+    # Format the whole column in one call instead of one `Size` per line
+    for size, directory in zip(format_sizes(sizes), directories):
+        print(f"{size.ljust(SIZE_FORMAT)}{directory}")
 
 
 def parse_args() -> argparse.Namespace:
@@ -12,6 +12,7 @@ from typing import Any
 from Color import cprint, fg, style
 from fsutils.dir import Dir
 from fsutils.video import Video
+from instrumentation import metrics
 from ProgressBar import ProgressBar
 from size import Size
 from ThreadPoolHelper import Pool
@@ -34,7 +35,7 @@ def main(
         num (int): Number of files to process at once. Defaults to all.
         filters (list[str]): List of file extensions to filter by. Defaults to all
     """
-    pool = Pool()
+    pool = Pool(shared=True)
 
     videos = [
         vid for vid in Dir(input_dir).videos()[:num] if vid.suffix.lower() in filters
@@ -78,10 +79,10 @@ def main(
                 failed_conversions.append(video)
             pb.increment()
     size_before = sum(
-        pool.execute(lambda x: x.size, successful_conversions, progress_bar=False)
+        pool.execute(lambda x: x.size, successful_conversions, progress_bar=False, chunksize=64)
     )
     size_after = sum(
-        pool.execute(lambda x: x.size, compressed_videos, progress_bar=False)
+        pool.execute(lambda x: x.size, compressed_videos, progress_bar=False, chunksize=64)
     )
     # Notify user of completion
     cprint.success("\nBatch conversion completed.", fg.green)
@@ -159,6 +160,9 @@ if __name__ == "__main__":
         sys.exit(0)
 
     space_saved = Size(size_before - size_after)
+    metrics.count("videos_compressed_total", len(success), status="ok")
+    metrics.count("videos_compressed_total", len(failed), status="failed")
+    metrics.count("compression_bytes_saved_total", size_before - size_after)
 
     cprint(f"\nSpace saved: {space_saved}", fg.green, style.bold)
 
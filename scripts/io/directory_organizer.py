@@ -21,7 +21,7 @@ from fsutils.img import Img
 from fsutils.utils.mimecfg import FILE_TYPES, IGNORED_DIRS
 from fsutils.video import Video
 from loggers import logger, logging
-from ThreadPoolHelper import Pool
+from Pipeline import Pipeline
 
 logger.setLevel(logging.INFO)
 MAX_DUPLICATES = 2
@@ -138,22 +138,36 @@ def get_next_available_path(dest_folder: Path, item: Base) -> Path:
     return dest_folder / f"{f'{max_count}-' if max_count > 0 else ''}{base_name}"
 
 
-def process_item(
-    item: Base,
-    dst: Dir,
-    sort_spec: str,
+def locate_item(item: Base, dst: Dir, sort_spec: str) -> tuple[Base, Path] | None:
+    """Read the metadata of an item (e.g. its capture date) and pick its destination folder.
+
+    Args:
+    ----
+        item: File object to process.
+        dst: Target directory root.
+        sort_spec: Date format for sorting (year, month, day).
+
+    Returns:
+    -------
+        The item and its destination folder, or None if the item should be skipped.
+    """
+    dest_folder = get_prefix(item=item, target=dst.path, sort_spec=sort_spec)
+    if dest_folder is None:
+        return None
+    return item, dest_folder
+
+
+def move_item(
+    located: tuple[Base, Path],
     keep: bool = False,
     dry_run: bool = False,
     one_filesystem: bool = False,
 ) -> Path | None:
-    """Process a single item and move/copy it to the appropriate destination folder.
+    """Move/copy an item located by `locate_item` into its destination folder.
 
     Args:
     ----
-        item: File object to process.
-        target_root: Target directory root.
-        index: Hash map of existing file hashes and paths.
-        sort_spec: Date format for sorting (year, month, day).
+        located: File object and its destination folder.
         keep: If True, copy instead of moving.
         dry_run: If True, do not actually move/copy files.
         one_filesystem: If True, use os.replace instead of shutil.copy
@@ -162,10 +176,7 @@ def process_item(
     -------
         Destination path if processed, None otherwise.
     """
-    dest_folder = get_prefix(item=item, target=dst.path, sort_spec=sort_spec)
-    if dest_folder is None:
-        return None
-
+    item, dest_folder = located
     dest_folder.mkdir(parents=True, exist_ok=True)
 
     dest_path = Path(dest_folder / item.name)
@@ -177,13 +188,22 @@ def process_item(
             print(f"[DRY RUN] - Moving '{item.path}' to '{dest_path}'")
             return None
         if keep:
-            logger.debug(f"Copying '{item.path}' to '{dest_path}'")
+            logger.debug(
+                f"Copying '{item.path}' to '{dest_path}'",
+                extra={"path": item.path, "dest": str(dest_path)},
+            )
             shutil.copy2(item.path, dest_path)
         elif one_filesystem:
-            logger.debug(f"Moving '{item.path}' to '{dest_path}'")
+            logger.debug(
+                f"Moving '{item.path}' to '{dest_path}'",
+                extra={"path": item.path, "dest": str(dest_path)},
+            )
             os.replace(item.path, dest_path)
         else:
-            logger.debug(f"Moving '{item.path}' to '{dest_path}'")
+            logger.debug(
+                f"Moving '{item.path}' to '{dest_path}'",
+                extra={"path": item.path, "dest": str(dest_path)},
+            )
             shutil.move(item.path, dest_path, copy_function=shutil.copy2)
         return dest_path
     except PermissionError as e:
@@ -194,6 +214,28 @@ def process_item(
         return None
 
 
+def process_item(
+    item: Base,
+    dst: Dir,
+    sort_spec: str,
+    keep: bool = False,
+    dry_run: bool = False,
+    one_filesystem: bool = False,
+) -> Path | None:
+    """Process a single item and move/copy it to the appropriate destination folder.
+
+    Equivalent to running `locate_item` and `move_item` back to back.
+
+    Returns:
+    -------
+        Destination path if processed, None otherwise.
+    """
+    located = locate_item(item, dst, sort_spec)
+    if located is None:
+        return None
+    return move_item(located, keep=keep, dry_run=dry_run, one_filesystem=one_filesystem)
+
+
 def main(
     src: str,
     dst: str,
@@ -211,6 +253,9 @@ def main(
         refresh_db: Whether to refresh the index if it exists.
         keep: If True, keep original files in source.
     """
+    # Pipeline workers log per file, keep terminal writes off their threads
+    # Not rate limited, the per-file lines are the record of what was changed
+    logger.enable_queue(rate_limit=False)
     dest_dir = Dir(dst)
     root_dir = Dir(src)
 
@@ -221,19 +266,21 @@ def main(
         else root_dir.fileobjects()
     )
 
-    pool = Pool()
+    # Reading capture dates is much slower than moving files, so it gets more workers
+    pipeline = (
+        Pipeline()
+        .stage(locate_item, workers=16, dst=dest_dir, sort_spec=spec)
+        .stage(
+            move_item,
+            workers=4,
+            keep=keep,
+            dry_run=dry_run,
+            one_filesystem=one_filesystem,
+        )
+    )
     num_moved = 0
 
-    for result in pool.execute(
-        process_item,
-        file_objs,
-        progress_bar=True,
-        dst=dest_dir,
-        sort_spec=spec,
-        keep=keep,
-        dry_run=dry_run,
-        one_filesystem=one_filesystem,
-    ):
+    for result in pipeline.run(file_objs, progress_bar=True):
         if result:
             num_moved += 1
 
@@ -1,5 +1,5 @@
 #!/usr/bin/env  python3
-from ThreadPoolHelper import Pool
+from ThreadPoolHelper import AsyncPool, run_subprocess
 import subprocess
 import re
 import sys
@@ -13,7 +13,7 @@ NMAP_REGEX = [
 ]
 
 
-def os_detect(host: str) -> tuple[str, ...]:
+async def os_detect(host: str) -> tuple[str, ...]:
     """Detect the operating system of a host using nmap.
 
     Args:
@@ -24,7 +24,9 @@ def os_detect(host: str) -> tuple[str, ...]:
     """
 
     # Run the nmap command to detect the OS
-    result = subprocess.getoutput(f"nmap -O {host} --osscan-limit --host-timeout=15s")
+    result = (
+        await run_subprocess("nmap", "-O", host, "--osscan-limit", "--host-timeout=15s")
+    ).stdout
     # Parse the output using regular expressions and list comprehension
     return host, *(
         y[0] if y is not None else "" for y in (re.search(x, result) for x in NMAP_REGEX)
@@ -41,7 +43,7 @@ def main(target: str) -> int:
         return 1
 
     template = "{:<15}|{:<50}|{:<60}|{}"
-    pool = Pool()
+    pool = AsyncPool(limit=64)
     print(template.format("Host", "Name", "OS", "TYPE"))
     print(template.format("-" * 15, "-" * 30, "-" * 20, "-" * 4))
 
@@ -11,6 +11,7 @@ from Color import cprint, fg
 from ExecutionTimer import ExecutionTimer
 from fsutils.dir import Dir
 from fsutils.file import Base
+from instrumentation import metrics
 from ThreadPoolHelper import Pool
 
 IGNORED_DIRS = [".Trash-1000"]
@@ -57,11 +58,12 @@ def remove_group(
 
 def main(root: str, dry_run=True, refresh=False, verbose=False) -> None:
     count = 0
-    with ExecutionTimer():
+    with ExecutionTimer() as timer:
         root_dir = Dir(root)
         # Create a dict mapping of hashed values to their associated files
         duplicate_groups = root_dir.duplicates(updatedb=refresh)
         num_duplicates = sum(len(group) for group in duplicate_groups)
+        timer.lap("index")
         cprint.info(f"\n{len(duplicate_groups)} sets,  {num_duplicates} duplicate files:")
         # Use a threadpool to remove duplicates if no_confirm  is set (for speed)
         pool = Pool()
@@ -72,7 +74,9 @@ def main(root: str, dry_run=True, refresh=False, verbose=False) -> None:
                 for file in result:
                     cprint(f"Removed {file}", fg.red)
             count += 1
+        timer.lap("remove")
     cprint.info(f"\n{count} duplicates removed")
+    metrics.count("duplicates_removed_total", count, dry_run=dry_run)
 
 
 def parse_args() -> argparse.Namespace:
@@ -13,13 +13,13 @@ from fsutils.dir import Dir, File
 from fsutils.img import Img
 from fsutils.video import Video
 from loggers import logger
-from size import Size
+from size import Size, SizeTotal
 from ThreadPoolHelper import Pool
 
 
 def process_files(
     file_paths: list[str], num_keep: int = 2, dry_run: bool = True
-) -> tuple[int, int]:
+) -> tuple[Size, int]:
     """Given a list of file paths and the number of duplicates to keep,
     return a list of file paths that should be kept.
 
@@ -31,21 +31,22 @@ def process_files(
 
     Returns:
     -------
-        - `(int, int)`: A tuple of two integers. The first integer is the total number of bytes saved by removing duplicates.
-            The second integer is the total number of duplicate files removed.
+        - `(Size, int)`: The total size saved by removing duplicates and the total number of
+            duplicate files removed.
     """
 
+    # Stat every file once, for both sorting and the size total
+    stats = {path: os.stat(path) for path in file_paths}
+
     def sort_key(filepath: str) -> tuple[float, float, float]:
-        st = os.stat(filepath)
+        st = stats[filepath]
         return (st.st_mtime, st.st_ctime, st.st_atime)
 
     oldest_to_newest = sorted(file_paths, key=sort_key, reverse=False)
-    size = 0
-    count = 0
+    removed = SizeTotal()
     if dry_run:
         for i, path in enumerate(oldest_to_newest):
-            size += os.path.getsize(path)
-            count += 1
+            removed.add(stats[path])
             fileobject = File(path)
             if isinstance(fileobject, (Video, Img)):
                 earliest_date = min(fileobject.capture_date, fileobject.mtime)
@@ -57,26 +58,27 @@ def process_files(
             else:
                 print(f"\033[31m{path:<80} {earliest_date:%Y-%m-%d %H:%M:%S}\033[0m")
         print("--------------------------------------")
-        return size, count
+        return removed.size, removed.count
     for i, path in enumerate(oldest_to_newest):
         if i < num_keep:
-            logger.info(f"Keeping {path}")
+            logger.info(f"Keeping {path}", extra={"path": path, "bytes": stats[path].st_size})
             # keep.add(path)
             continue
-        logger.info(f"Removing {path}")
+        logger.info(f"Removing {path}", extra={"path": path, "bytes": stats[path].st_size})
         # remove.append(path)
-        size += os.path.getsize(path)
+        removed.add(stats[path])
         # os.remove(path)
 
-        count += 1
-
-    return size, count
+    return removed.size, removed.count
 
 
 def main(db: dict[str, set[str]], num_keep: int, dry_run=True, debug=False) -> int:
     """Remove newest files for duplicates found in <PATH>."""
+    # `process_files` logs from the pool's workers, keep terminal writes off their threads
+    # Not rate limited, the per-file lines are the record of what was changed
+    logger.enable_queue(rate_limit=False)
     pool = Pool()
-    size_of_removed = 0
+    size_of_removed = Size(0)
     num_removed = 0
     print("\nCalculating...")
     for duplicate_items in pool.execute(
@@ -102,7 +104,7 @@ def main(db: dict[str, set[str]], num_keep: int, dry_run=True, debug=False) -> i
         #     size_of_removed = sum()
         #     num_removed += len(remove)
 
-    print(f"\nSpace saved: {Size(size_of_removed)!s} by removing {num_removed} files")
+    print(f"\nSpace saved: {size_of_removed!s} by removing {num_removed} files")
     return 0
 
 
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""pool_benchmark.py - Benchmark ThreadPoolHelper against executor baselines.
+
+Measures per-task overhead, scaling from 1 to N workers, memory per pending task
+and the cost of progress reporting. `Pool` and `AsyncPool` are compared with
+`ThreadPoolExecutor.map`, `multiprocessing.Pool.imap_unordered` and plain asyncio
+on synthetic CPU, I/O and sleep workloads. Results are written as JSON so runs can
+be compared with `--compare`.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from ThreadPoolHelper import AsyncPool, Pool, ProgressSink, StatsProgress, TqdmProgress
+
+CPU_LOOPS = 20_000
+SLEEP_SECONDS = 0.002
+IO_BYTES = 64 * 1024
+IO_FILE = os.path.join(tempfile.gettempdir(), "pool_benchmark.bin")
+
+Runner = Callable[[Callable[[int], Any], list[int], int], None]
+
+
+# --- Workloads (module level so they can be pickled) ---------------------------
+
+
+def noop(item: int) -> int:
+    return item
+
+
+def cpu(item: int) -> int:
+    total = 0
+    for i in range(CPU_LOOPS):
+        total += i * i
+    return total + item
+
+
+def io(item: int) -> int:
+    with open(IO_FILE, "rb") as f:
+        return len(f.read()) + item
+
+
+def sleep(item: int) -> int:
+    time.sleep(SLEEP_SECONDS)
+    return item
+
+
+WORKLOADS: dict[str, Callable[[int], Any]] = {"cpu": cpu, "io": io, "sleep": sleep}
+
+
+# --- Runners -------------------------------------------------------------------
+
+
+def run_pool(function: Callable[[int], Any], items: list[int], workers: int) -> None:
+    for _ in Pool(max_workers=workers).execute(function, items, progress_bar=False):
+        pass
+
+
+def run_pool_streaming(function: Callable[[int], Any], items: list[int], workers: int) -> None:
+    pool = Pool(max_workers=workers, max_pending=workers * 4)
+    for _ in pool.execute(function, iter(items), progress_bar=False, total=len(items)):
+        pass
+
+
+def run_pool_chunked(function: Callable[[int], Any], items: list[int], workers: int) -> None:
+    pool = Pool(max_workers=workers)
+    for _ in pool.execute(function, items, progress_bar=False, chunksize=64):
+        pass
+
+
+def run_pool_process(function: Callable[[int], Any], items: list[int], workers: int) -> None:
+    for _ in Pool(backend="process", max_workers=workers).execute(
+        function, items, progress_bar=False
+    ):
+        pass
+
+
+def run_async_pool(function: Callable[[int], Any], items: list[int], workers: int) -> None:
+    for _ in AsyncPool(limit=workers).execute(function, items, progress_bar=False):
+        pass
+
+
+def run_thread_map(function: Callable[[int], Any], items: list[int], workers: int) -> None:
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for _ in executor.map(function, items):
+            pass
+
+
+def run_mp_imap(function: Callable[[int], Any], items: list[int], workers: int) -> None:
+    chunksize = max(1, len(items) // (workers * 4))
+    with multiprocessing.Pool(workers) as pool:
+        for _ in pool.imap_unordered(function, items, chunksize):
+            pass
+
+
+def run_asyncio(function: Callable[[int], Any], items: list[int], workers: int) -> None:
+    async def main() -> None:
+        semaphore = asyncio.Semaphore(workers)
+
+        async def call(item: int) -> Any:
+            async with semaphore:
+                if function is sleep:
+                    # Native coroutine: the case asyncio is meant for
+                    return await asyncio.sleep(SLEEP_SECONDS, item)
+                return await asyncio.to_thread(function, item)
+
+        await asyncio.gather(*(call(item) for item in items))
+
+    asyncio.run(main())
+
+
+RUNNERS: dict[str, Runner] = {
+    "pool": run_pool,
+    "pool_streaming": run_pool_streaming,
+    "pool_chunked": run_pool_chunked,
+    "pool_process": run_pool_process,
+    "async_pool": run_async_pool,
+    "thread_map": run_thread_map,
+    "mp_imap_unordered": run_mp_imap,
+    "asyncio": run_asyncio,
+}
+
+
+# --- Benchmarks ----------------------------------------------------------------
+
+
+def timed(func: Callable[[], None], repeat: int) -> float:
+    """Best wall time of `repeat` runs, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def record(
+    benchmark: str,
+    runner: str,
+    workload: str,
+    workers: int,
+    items: int,
+    seconds: float,
+    **extra: Any,
+) -> dict[str, Any]:
+    return {
+        "benchmark": benchmark,
+        "runner": runner,
+        "workload": workload,
+        "workers": workers,
+        "items": items,
+        "seconds": seconds,
+        "items_per_s": items / seconds if seconds else None,
+        **extra,
+    }
+
+
+def bench_overhead(items: int, workers: int, repeat: int, runners: Iterable[str]) -> list[dict]:
+    """Per-task overhead: run a no-op function through every runner."""
+    data = list(range(items))
+    results = []
+    for name in runners:
+        seconds = timed(lambda: RUNNERS[name](noop, data, workers), repeat)
+        results.append(
+            record(
+                "overhead", name, "noop", workers, items, seconds, us_per_task=seconds / items * 1e6
+            )
+        )
+    return results
+
+
+def bench_scaling(items: int, max_workers: int, repeat: int, runners: Iterable[str]) -> list[dict]:
+    """Throughput of each workload from 1 to `max_workers` workers (powers of two)."""
+    counts = sorted(
+        {1 << i for i in range(max_workers.bit_length()) if 1 << i <= max_workers} | {max_workers}
+    )
+    results = []
+    for workload, function in WORKLOADS.items():
+        data = list(range(items))
+        for workers in counts:
+            for name in runners:
+                seconds = timed(lambda: RUNNERS[name](function, data, workers), repeat)
+                results.append(record("scaling", name, workload, workers, items, seconds))
+    return results
+
+
+def bench_memory(items: int, workers: int) -> list[dict]:
+    """Peak traced memory per task while the whole data source is being processed."""
+    data = list(range(items))
+    results = []
+    for name in ("pool", "pool_streaming", "thread_map"):
+        tracemalloc.start()
+        start = time.perf_counter()
+        RUNNERS[name](noop, data, workers)
+        seconds = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results.append(
+            record(
+                "memory",
+                name,
+                "noop",
+                workers,
+                items,
+                seconds,
+                peak_bytes=peak,
+                bytes_per_task=peak / items,
+            )
+        )
+    return results
+
+
+def bench_progress(items: int, workers: int, repeat: int) -> list[dict]:
+    """Cost of progress reporting on a no-op workload."""
+    data = list(range(items))
+    devnull = open(os.devnull, "w")
+    sinks: dict[str, Callable[[], bool | ProgressSink]] = {
+        "none": lambda: False,
+        "tqdm_per_task": lambda: TqdmProgress(interval=0, file=devnull, mininterval=0),
+        "tqdm_batched": lambda: TqdmProgress(file=devnull),
+        "stats": lambda: StatsProgress(callback=lambda _: None),
+    }
+    results = []
+    for name, sink in sinks.items():
+
+        def run() -> None:
+            for _ in Pool(max_workers=workers, max_pending=workers * 4).execute(noop, data, sink()):
+                pass
+
+        seconds = timed(run, repeat)
+        results.append(record("progress", f"pool[{name}]", "noop", workers, items, seconds))
+    devnull.close()
+    return results
+
+
+def compare(results: list[dict], baseline_path: str, threshold: float) -> int:
+    """Print the throughput change against a previous run. Returns the number of regressions."""
+    with open(baseline_path) as f:
+        baseline = {
+            (r["benchmark"], r["runner"], r["workload"], r["workers"]): r
+            for r in json.load(f)["results"]
+        }
+    regressions = 0
+    for r in results:
+        old = baseline.get((r["benchmark"], r["runner"], r["workload"], r["workers"]))
+        if not old or not old["items_per_s"] or not r["items_per_s"]:
+            continue
+        change = r["items_per_s"] / old["items_per_s"] - 1
+        flag = ""
+        if change < -threshold:
+            regressions += 1
+            flag = "\033[31m REGRESSION\033[0m"
+        key = f"{r['benchmark']:<9} {r['runner']:<22} {r['workload']:<6} {r['workers']:>3}w"
+        print(f"{key} {change:+8.1%}{flag}")
+    return regressions
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0],
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "-o", "--output", default="pool_benchmark.json", help="JSON file to write results to"
+    )
+    parser.add_argument("-n", "--items", type=int, default=2000, help="Items per scaling run")
+    parser.add_argument(
+        "--overhead-items",
+        type=int,
+        default=50_000,
+        help="Items for overhead, memory and progress runs",
+    )
+    parser.add_argument(
+        "-w", "--max-workers", type=int, default=os.cpu_count() or 1, help="Largest worker count"
+    )
+    parser.add_argument(
+        "-r", "--repeat", type=int, default=3, help="Runs per measurement, best is kept"
+    )
+    parser.add_argument(
+        "--runners",
+        nargs="+",
+        choices=list(RUNNERS),
+        default=list(RUNNERS),
+        help="Runners to compare",
+    )
+    parser.add_argument(
+        "--only",
+        nargs="+",
+        choices=["overhead", "scaling", "memory", "progress"],
+        default=["overhead", "scaling", "memory", "progress"],
+        help="Benchmarks to run",
+    )
+    parser.add_argument("--compare", metavar="JSON", help="Previous results to compare against")
+    parser.add_argument(
+        "--threshold", type=float, default=0.10, help="Slowdown reported as a regression"
+    )
+    return parser.parse_args()
+
+
+def main(args: argparse.Namespace) -> int:
+    with open(IO_FILE, "wb") as f:
+        f.write(os.urandom(IO_BYTES))
+
+    results: list[dict] = []
+    try:
+        if "overhead" in args.only:
+            results += bench_overhead(
+                args.overhead_items, args.max_workers, args.repeat, args.runners
+            )
+        if "scaling" in args.only:
+            results += bench_scaling(args.items, args.max_workers, args.repeat, args.runners)
+        if "memory" in args.only:
+            results += bench_memory(args.overhead_items, args.max_workers)
+        if "progress" in args.only:
+            results += bench_progress(args.overhead_items, args.max_workers, args.repeat)
+    finally:
+        os.remove(IO_FILE)
+
+    meta = {
+        "timestamp": time.time(),
+        "python": sys.version,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "args": {k: v for k, v in vars(args).items() if k not in {"output", "compare"}},
+    }
+    with open(args.output, "w") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=2)
+    print(f"Wrote {len(results)} results to {args.output}")
+
+    if args.compare:
+        return 1 if compare(results, args.compare, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(parse_args()))